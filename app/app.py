@@ -1,11 +1,13 @@
 from fasthtml.common import *
 import os
-import aiofiles
-import fitz
-from statemanager import StateManager
+from starlette.middleware import Middleware
+from starlette.responses import StreamingResponse
+from starlette.staticfiles import StaticFiles
+from statemanager import SessionStateMiddleware, get_state
 from meri.meri import MERI
 from utils import *
 import json
+import orjson
 import argparse
 
 
@@ -20,17 +22,12 @@ int_format_link = Link(rel="stylesheet", href="intermediate_format.css")
 
 public_path = os.path.join(os.path.abspath(os.path.join(__file__, os.pardir, "public")))
 
-app = FastHTML(hdrs=(tlink, dlink, int_format_link), static_path=public_path)
+app = FastHTML(hdrs=(tlink, dlink, int_format_link), static_path=public_path,
+               middleware=[Middleware(SessionStateMiddleware)])
 
 upload_dir = Path("uploads")
 upload_dir.mkdir(exist_ok=True)
 
-# Define a route to serve static files
-@app.route("/{fname:path}.{ext:static}")
-async def get(fname: str, ext: str):
-    return FileResponse(f'{public_path}/{fname}.{ext}')
-    #return FileResponse(f'public/{fname}.{ext}')
-
 def submit_button(text: str):
     return Button(text, type="submit", cls="btn btn-neutral"),
 
@@ -44,22 +41,43 @@ def action_button(text: str, *args, **kwargs):
 def carossel_item(id, base_64_str):
     return Div(Img(src=base_64_str, cls="w-fill"), id=id, cls="carousel-item w-full")
 
-def json_collapse(summary: str, json_dict):
+# above this rendered size the json collapse is streamed in chunks instead
+# of being sent as one giant response write
+_JSON_STREAM_THRESHOLD = 64 * 1024
+_JSON_STREAM_CHUNK = 8 * 1024
+
+def _json_collapse_component(summary: str, rendered_json: str):
     return Details(
             Summary(summary, cls="collapse-title text-m font-medium"),
                 Div(
                     Pre(
-                    json.dumps(json_dict, indent=4),
+                    rendered_json,
                     cls="language-json whitespace-pre-wrap font-mono bg-gray-100 p-4 rounded-lg max-h-[50vh] overflow-y-auto"
                 ),
                 cls="collapse-content", style="padding: 1rem", id = "schema_panel"),
             cls="collapse bg-base-200")
 
+def json_collapse(summary: str, json_dict):
+    # orjson writes UTF-8 natively, so Chinese parameter names are not
+    # escaped and the indent walk runs in C
+    rendered = orjson.dumps(json_dict, option=orjson.OPT_INDENT_2).decode()
+    component = _json_collapse_component(summary, rendered)
+    if len(rendered) < _JSON_STREAM_THRESHOLD:
+        return component
+
+    html = to_xml(component)
+
+    async def body():
+        for i in range(0, len(html), _JSON_STREAM_CHUNK):
+            yield html[i:i + _JSON_STREAM_CHUNK]
+
+    return StreamingResponse(body(), media_type="text/html")
+
 
 
 def header():
-    
-    return Title('MERI demo'), Div(
+
+    return Div(
         Img(src="meri_logo.svg", cls="object-scale-down h-10"),
             #H1("MERI", cls="text-3xl font-bold text-center text-black"),
         cls="navbar bg-base-300 rounded-2xl shadow-lg p-2")
@@ -147,68 +165,82 @@ def action_panel():
 @app.post("/extract_parameters")
 async def extract_parameters():
     
-    with open(StateManager().schema_path) as f:
+    state = get_state()
+    with open(state.schema_path) as f:
         json_schema = json.load(f)
 
-    populated_schema = StateManager().meri.run(json.dumps(json_schema))
-    StateManager().set_populated_schema(json.dumps(populated_schema))
+    populated_schema = state.meri.run(json_schema)
+    state.populated_schema = populated_schema
 
     return json_collapse("Show populated schema", populated_schema)
 
 @app.post("/upload_schema")
-async def upload_schema(target_schema: File, request: Request = None):
-    form = await request.form()
+async def upload_schema(target_schema: File):
 
     # Save uploaded files
     target_schema_f_name = os.path.join(upload_dir, target_schema.filename)
     await save_file(target_schema, target_schema_f_name)
 
-    StateManager().set_schema_path(target_schema_f_name)
+    get_state().schema_path = target_schema_f_name
 
-    with open(target_schema_f_name) as f:
-        json_data = json.load(f)
+    with open(target_schema_f_name, 'rb') as f:
+        json_data = orjson.loads(f.read())
 
     return json_collapse("Show schema", json_data)
 
 @app.post("/to_intermediate")
 async def to_intermediate():
 
-    meri = MERI(StateManager().pdf_path, model=args.model)
+    state = get_state()
+    meri = MERI(state.pdf_path, model=args.model)
     meri.to_intermediate()
 
-    StateManager().set_meri(meri)
+    state.meri = meri
     return Div(NotStr(meri.int_format), id="int_format")
         
 
 @app.post('/upload_pdf')
-async def upload_pdf(pdf_file: File, request: Request = None):
-    form = await request.form()
+async def upload_pdf(pdf_file: File):
 
     # Save uploaded files
     pdf_f_name = os.path.join(upload_dir, pdf_file.filename)
     await save_file(pdf_file, pdf_f_name)
 
-    StateManager().set_pdf_path(pdf_f_name)
+    state = get_state()
+    state.pdf_path = pdf_f_name
 
-    carossel_items = [] 
-    for i, (im, base_64_str) in enumerate(get_pdf_images(StateManager().pdf_path)):
-        carossel_items.append(carossel_item(id=f"item{i}", base_64_str=base_64_str))
-        
-    return Div(Div(*carossel_items, cls="carousel w-full"), 
-               Div(*[A(str(i+1), href=f"#item{i}", cls="btn btn-xs") for i in range(len(carossel_items))], cls="flex w-full justify-center gap-2 py-2"),
+    # build carousel item and index link per page in one pass
+    def _items_and_links(pages):
+        for i, base_64_str in enumerate(pages):
+            yield (carossel_item(id=f"item{i}", base_64_str=base_64_str),
+                   A(str(i + 1), href=f"#item{i}", cls="btn btn-xs"))
+
+    pairs = list(_items_and_links(get_pdf_images(state.pdf_path)))
+    items, links = zip(*pairs) if pairs else ((), ())
+
+    return Div(Div(*items, cls="carousel w-full"),
+               Div(*links, cls="flex w-full justify-center gap-2 py-2"),
                 cls="w-full")
    
 
 
+# the landing shell carries no request state, so serialize it once at import
+_LANDING_HTML = to_xml(Div(
+    header(),
+    Div(pdf_panel(), Div(cls="divider divider-horizontal pt-4 pb-4"), action_panel(), cls="flex h-screen"),
+    cls="flex flex-col h-screen", data_theme="pastel"
+))
+
+
 @app.route('/')
 def get():
 
-    return Div(
-        header(), 
-        Div(pdf_panel(), Div(cls="divider divider-horizontal pt-4 pb-4"), action_panel(), cls="flex h-screen"),
-        cls="flex flex-col h-screen", data_theme="pastel"
-    )
-       
+    return Title('MERI demo'), NotStr(_LANDING_HTML)
+
+
+# serve public/ assets via StaticFiles (kernel sendfile path) instead of a
+# Python-level route; mounted last so the dynamic routes above take priority
+app.mount("/", StaticFiles(directory=public_path, check_dir=False), name="static")
 
 
 serve(port=5010)
\ No newline at end of file
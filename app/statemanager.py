@@ -1,24 +1,92 @@
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
 from meri.meri import MERI
 
-class StateManager():
-
-    pdf_path: str = None
-    schema_path: str = None
-    meri: MERI = None
-    populated_schema: str = None
-
-    @classmethod
-    def set_pdf_path(cls, pdf_path: str):
-        cls.pdf_path = pdf_path
-
-    @classmethod
-    def set_schema_path(cls, schema_path: str):
-        cls.schema_path = schema_path
-    
-    @classmethod
-    def set_meri(cls, meri: MERI):
-        cls.meri = meri
-    
-    @classmethod
-    def set_populated_schema(cls, schema: str):
-        cls.populated_schema = schema
\ No newline at end of file
+
+@dataclass
+class SessionState:
+    """Per-session state, bound to the current request via a ContextVar."""
+
+    pdf_path: Optional[str] = None
+    schema_path: Optional[str] = None
+    meri: Optional[MERI] = None
+    populated_schema: Optional[dict] = None
+
+
+_current: ContextVar[SessionState] = ContextVar("meri_state")
+# LRU-bounded: each state can pin a full MERI instance, and clients that
+# drop the cookie would otherwise grow the table by one entry per request.
+# least-recently-seen sessions are evicted once the cap is reached; an
+# in-flight request keeps its evicted state alive via the ContextVar.
+_MAX_SESSIONS = 64
+_sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+
+
+def get_state() -> SessionState:
+    """Returns the SessionState bound to the current request."""
+    try:
+        return _current.get()
+    except LookupError:
+        # outside a request (e.g. scripts) fall back to a fresh state
+        state = SessionState()
+        _current.set(state)
+        return state
+
+
+class SessionStateMiddleware:
+    """Pure ASGI middleware that binds a per-session SessionState to the
+    request context, so concurrent users no longer overwrite each other's
+    uploaded pdf/schema paths."""
+
+    COOKIE_NAME = "meri_session"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session_id = self._session_id_from_scope(scope)
+        new_session = session_id is None or session_id not in _sessions
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+
+        state = _sessions.get(session_id)
+        if state is None:
+            state = _sessions[session_id] = SessionState()
+            while len(_sessions) > _MAX_SESSIONS:
+                _sessions.popitem(last=False)
+        else:
+            _sessions.move_to_end(session_id)
+        token = _current.set(state)
+        try:
+            if new_session:
+                cookie = f"{self.COOKIE_NAME}={session_id}; Path=/; HttpOnly"
+
+                async def send_with_cookie(message):
+                    if message["type"] == "http.response.start":
+                        headers = list(message.get("headers", []))
+                        headers.append((b"set-cookie", cookie.encode("latin-1")))
+                        message["headers"] = headers
+                    await send(message)
+
+                await self.app(scope, receive, send_with_cookie)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+
+    def _session_id_from_scope(self, scope) -> Optional[str]:
+        for key, value in scope.get("headers", []):
+            if key == b"cookie":
+                for part in value.decode("latin-1").split(";"):
+                    name, _, cookie_value = part.strip().partition("=")
+                    if name == self.COOKIE_NAME:
+                        return cookie_value
+        return None
@@ -1,22 +1,64 @@
 from meri.utils.utils import pdf_to_im, pil_to_base64
+import asyncio
+import hashlib
 import os
-import aiofiles
-import fitz
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-def get_pdf_images(pdf_path: str):
-    pdf_pages = fitz.open(pdf_path)
+# rendered pages keyed by content hash, so re-uploading the same PDF
+# skips rasterization and base64 encoding entirely
+_raster_cache: OrderedDict = OrderedDict()
+_RASTER_CACHE_SIZE = 8
 
-    pdf_ims_base64 = []
-    for page in pdf_pages:
-        im = pdf_to_im(page)
-        base_64_im = pil_to_base64(im, raw=False)
-        pdf_ims_base64.append((im, base_64_im))
+# below this page count the process pool costs more than it saves
+_PARALLEL_PAGE_THRESHOLD = 4
 
-    return pdf_ims_base64
+def _render_page_to_b64(args):
+    import fitz  # deferred: keeps PyMuPDF off the app startup path
 
-async def save_file(uploaded_file, path):
+    pdf_path, page_number = args
+    doc = fitz.open(pdf_path)
+    try:
+        return pil_to_base64(pdf_to_im(doc[page_number]), raw=False)
+    finally:
+        doc.close()
+
+def _rasterize(pdf_path: str) -> tuple:
+    import fitz  # deferred: keeps PyMuPDF off the app startup path
+
+    doc = fitz.open(pdf_path)
+    n_pages = len(doc)
+
+    if n_pages < _PARALLEL_PAGE_THRESHOLD:
+        return tuple(pil_to_base64(pdf_to_im(page), raw=False) for page in doc)
+    doc.close()
+
+    # PNG encode + base64 hold the GIL, so pages render in worker processes
+    with ProcessPoolExecutor() as executor:
+        return tuple(executor.map(_render_page_to_b64,
+                                  [(pdf_path, i) for i in range(n_pages)]))
 
+def get_pdf_images(pdf_path: str):
+    with open(pdf_path, 'rb') as f:
+        digest = hashlib.blake2b(f.read()).hexdigest()
+
+    pages = _raster_cache.get(digest)
+    if pages is None:
+        pages = _rasterize(pdf_path)
+        _raster_cache[digest] = pages
+        if len(_raster_cache) > _RASTER_CACHE_SIZE:
+            _raster_cache.popitem(last=False)
+    else:
+        _raster_cache.move_to_end(digest)
+
+    yield from pages
+
+def _sync_write(path, file_obj):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    async with aiofiles.open(path, 'wb') as out_file:
-        content = await uploaded_file.read()
-        await out_file.write(content)
+    with open(path, 'wb') as out_file:
+        shutil.copyfileobj(file_obj, out_file)
+
+async def save_file(uploaded_file, path):
+    # single thread hop for the whole transfer instead of one per aiofiles call
+    await asyncio.to_thread(_sync_write, path, uploaded_file.file)
@@ -9,12 +9,16 @@
 3. 运行脚本：python compare_params.py
 """
 
+import asyncio
 import json
 import os
+import re
 from datetime import datetime
-from jinja2 import Template
+
+import orjson
 
 from meri.utils.llm_utils import complete_chat
+from meri.utils.numeric_compare import fast_compare
 
 
 # ============================================================
@@ -36,23 +40,27 @@ OUTPUT_DIR = "output"
 # 每批处理的参数数量（可根据实际情况调整）
 BATCH_SIZE = 20
 
+# 并发调用大模型的最大批次数
+MAX_CONCURRENT_BATCHES = 8
+
 
 # ============================================================
 # 匹配对比Prompt
 # ============================================================
-COMPARE_PROMPT = Template("""
+# 纯 str.format 模板（四个占位符），不再引入 Jinja2；JSON 示例中的花括号已转义
+COMPARE_PROMPT = """
 你是一个专业的电气设备技术参数匹配对比专家。
 
 ## 核心任务
 对于每个用户参数，在规范数据库中查找对应的规范要求，并判断用户参数值是否符合规范。
 
-## 规范数据库（共 {{ spec_count }} 个参数）
+## 规范数据库（共 {spec_count} 个参数）
 格式: [类型] 参数名: 规范值
 类型说明: A=关键参数不可变更, B=变更需审核, C=可调整, D=通用参数变更需特殊申请
-{{ spec_params }}
+{spec_params}
 
-## 用户提取的参数（本批 {{ user_count }} 个，需要逐一匹配）
-{{ user_params }}
+## 用户提取的参数（本批 {user_count} 个，需要逐一匹配）
+{user_params}
 
 ## 匹配规则
 
@@ -98,18 +106,18 @@ COMPARE_PROMPT = Template("""
 
 ## 输出格式（严格JSON，只包含以下6个字段）
 ```json
-{
+{{
     "results": [
-        {
+        {{
             "user_param_name": "用户参数名称",
             "user_value": "用户参数值",
             "matched_spec_name": "匹配到的规范参数名（未找到则为null）",
             "spec_value": "规范要求值（未找到则为null）",
             "param_type": "参数类型A/B/C/D（未找到则为null）",
             "is_compliant": true/false/null
-        }
+        }}
     ]
-}
+}}
 ```
 
 ## 重要提示
@@ -118,7 +126,34 @@ COMPARE_PROMPT = Template("""
 3. param_type: 从规范数据库中获取该参数的类型（A/B/C/D），如未匹配到则为null
 4. 只输出上述6个字段，不要添加其他字段
 5. 只输出JSON，不要输出其他内容
-""")
+"""
+
+
+_THINK_BLOCK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+
+
+def _extract_json(text: str) -> str:
+    """从大模型输出中提取JSON文本
+
+    容忍思考块、markdown围栏和附加说明，减少因格式问题导致的整轮重试
+    """
+    text = _THINK_BLOCK_RE.sub("", text)
+
+    fenced = _JSON_FENCE_RE.search(text)
+    if fenced:
+        return fenced.group(1)
+
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end > start:
+        return text[start:end + 1]
+    return text
+
+
+# 不适用"用户值≤规范值即合规"快速判断的参数：机械寿命的判断方向相反，
+# 断口数、操作顺序、电源电压等按prompt规则3.3要求精确/兼容匹配
+_NO_PREFILTER_NAME_RE = re.compile(r"寿命|断口|操作顺序|电源电压")
 
 
 class ParamComparator:
@@ -127,15 +162,51 @@ class ParamComparator:
     def __init__(self, model: str = MODEL):
         self.model = model
         self.spec_params = []
-    
+        self._spec_str = ""
+        self._spec_type_by_name = {}
+        self._spec_by_name = {}
+        self._spec_index_source = None
+        self._prompt_parts = None
+        self._prompt_source = None
+
     def load_spec_database(self, db_path: str):
         """加载规范数据库"""
         print(f"📂 加载规范数据库: {db_path}")
         with open(db_path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        
+
         self.spec_params = data.get("parameters", [])
+        # 规范库加载后不再变化，预先格式化规范文本、类型索引和模板分段
+        self._ensure_spec_index()
+        self._ensure_prompt_parts()
         print(f"  ✓ 加载了 {len(self.spec_params)} 个规范参数")
+
+    def _ensure_prompt_parts(self):
+        """按当前规范表重建规范文本和模板分段（已是最新时直接返回）
+
+        spec_params 被直接赋值的调用路径在首次渲染提示词时补算。
+        """
+        if self._prompt_source is self.spec_params:
+            return
+        self._spec_str = "\n".join(
+            f"- [{p['type']}] {p.get('name')}: {p.get('value')}" if p.get('type')
+            else f"- {p.get('name')}: {p.get('value')}"
+            for p in self.spec_params
+        )
+        self._spec_type_by_name = {p.get('name'): p.get('type', '') for p in self.spec_params}
+
+        # 规范部分在两次赋值之间固定：预先代入模板并按用户占位符切成
+        # 三段，每批渲染只需拼接用户参数部分
+        partial = COMPARE_PROMPT.format(
+            spec_count=len(self.spec_params),
+            spec_params=self._spec_str,
+            user_count="\x00",
+            user_params="\x01",
+        )
+        head, rest = partial.split("\x00")
+        mid, tail = rest.split("\x01")
+        self._prompt_parts = (head, mid, tail)
+        self._prompt_source = self.spec_params
     
     def load_extraction_result(self, result_path: str) -> dict:
         """加载提取结果"""
@@ -146,34 +217,41 @@ class ParamComparator:
         return data
     
     def _format_spec_params(self) -> str:
-        """格式化规范参数列表（包含类型信息）"""
-        lines = []
-        for p in self.spec_params:
-            param_type = p.get('type', '')
-            if param_type:
-                lines.append(f"- [{param_type}] {p.get('name')}: {p.get('value')}")
-            else:
-                lines.append(f"- {p.get('name')}: {p.get('value')}")
-        return "\n".join(lines)
-    
+        """格式化规范参数列表（包含类型信息），预计算后直接复用"""
+        self._ensure_prompt_parts()
+        return self._spec_str
+
     def _get_spec_type(self, spec_name: str) -> str:
         """根据规范参数名获取其类型"""
-        for p in self.spec_params:
-            if p.get('name') == spec_name:
-                return p.get('type', '')
-        return ''
-    
+        return self._spec_type_by_name.get(spec_name, '')
+
+    def _ensure_spec_index(self):
+        """按当前规范表重建 name→参数 索引（已是最新时直接返回）
+
+        web_app 等调用方会直接给 spec_params 赋值而不走
+        load_spec_database，索引在首次使用时按需补算。
+        """
+        if self._spec_index_source is self.spec_params:
+            return
+        self._spec_by_name = {p.get('name'): p for p in self.spec_params}
+        self._spec_index_source = self.spec_params
+
+    @staticmethod
+    def _user_value_text(p: dict) -> str:
+        # 用户参数可能有unit字段也可能没有，兼容处理
+        value = p.get('value', '')
+        unit = p.get('unit', '')
+        if unit and not str(value).endswith(unit):
+            value = f"{value}{unit}"
+        return str(value)
+
+    @classmethod
+    def _format_user_param(cls, p: dict) -> str:
+        return f"- {p.get('name')}: {cls._user_value_text(p)}"
+
     def _format_user_params(self, params: list) -> str:
         """格式化用户参数列表"""
-        lines = []
-        for p in params:
-            # 用户参数可能有unit字段也可能没有，兼容处理
-            value = p.get('value', '')
-            unit = p.get('unit', '')
-            if unit and not str(value).endswith(unit):
-                value = f"{value}{unit}"
-            lines.append(f"- {p.get('name')}: {value}")
-        return "\n".join(lines)
+        return "\n".join(self._format_user_param(p) for p in params)
     
     def _call_llm(self, prompt: str) -> dict:
         """调用大模型"""
@@ -192,9 +270,9 @@ class ParamComparator:
                     max_tokens=8192
                 )
                 
-                return json.loads(response)
-                
-            except json.JSONDecodeError:
+                return orjson.loads(_extract_json(response))
+
+            except orjson.JSONDecodeError:
                 if attempt < 2:
                     print(f"    ⚠️ JSON解析失败，重试中...")
                     continue
@@ -207,64 +285,134 @@ class ParamComparator:
         
         return {"results": []}
     
+    def _prefilter_batch(self, user_params_batch: list) -> tuple:
+        """本地预判明显的数值对比，返回 (已判定结果, 仍需大模型的参数)
+
+        仅处理参数名与规范库精确一致且双方都是简单数值表达的情况；
+        机械寿命类参数的判断方向与常规能力型参数相反，断口数、操作
+        顺序、电源电压等精确匹配型参数不按能力上限判断，都交给大模型。
+        """
+        resolved = []
+        remaining = []
+        self._ensure_spec_index()
+        for p in user_params_batch:
+            name = p.get('name')
+            spec = self._spec_by_name.get(name)
+            verdict = None
+            if spec is not None and not _NO_PREFILTER_NAME_RE.search(str(name)):
+                verdict = fast_compare(self._user_value_text(p), str(spec.get('value', '')))
+
+            if verdict is None:
+                remaining.append(p)
+            else:
+                resolved.append({
+                    "user_param_name": name,
+                    "user_value": self._user_value_text(p),
+                    "matched_spec_name": name,
+                    "spec_value": spec.get('value'),
+                    "param_type": spec.get('type') or None,
+                    "is_compliant": verdict,
+                })
+        return resolved, remaining
+
     def _compare_batch(self, user_params_batch: list) -> list:
         """对一批参数进行匹配对比"""
-        spec_str = self._format_spec_params()
-        user_str = self._format_user_params(user_params_batch)
-        
-        prompt = COMPARE_PROMPT.render(
-            spec_params=spec_str,
-            spec_count=len(self.spec_params),
-            user_params=user_str,
-            user_count=len(user_params_batch)
-        )
-        
+        resolved, remaining = self._prefilter_batch(user_params_batch)
+        if not remaining:
+            return resolved
+
+        user_str = self._format_user_params(remaining)
+
+        self._ensure_prompt_parts()
+        head, mid, tail = self._prompt_parts
+        prompt = f"{head}{len(remaining)}{mid}{user_str}{tail}"
+
         result = self._call_llm(prompt)
-        return result.get("results", [])
-    
-    def compare(self, extraction_result: dict) -> dict:
+        return resolved + result.get("results", [])
+
+    async def _compare_batch_async(self, user_params_batch: list, semaphore: asyncio.Semaphore,
+                                   batch_num: int, total_batches: int) -> list:
+        """并发执行一批参数的匹配对比"""
+        async with semaphore:
+            print(f"\n  🔄 处理第 {batch_num}/{total_batches} 批 ({len(user_params_batch)} 个参数)...")
+            return await asyncio.to_thread(self._compare_batch, user_params_batch)
+
+    async def compare(self, extraction_result: dict) -> dict:
         """执行对比"""
         print(f"\n{'='*60}")
         print(f"🔍 参数匹配对比（大模型语义匹配）")
         print(f"{'='*60}")
-        
+
         user_params = extraction_result.get("parameters", [])
         print(f"待匹配参数数: {len(user_params)}")
         print(f"规范参数数: {len(self.spec_params)}")
-        
+
         all_results = []
+
+        # 分批并发处理：各批相互独立，总耗时从 N×RTT 降到 ~max(RTT)
+        batches = [user_params[i:i + BATCH_SIZE] for i in range(0, len(user_params), BATCH_SIZE)]
+        total_batches = len(batches)
+        print(f"\n📦 分 {total_batches} 批处理（最多 {MAX_CONCURRENT_BATCHES} 批并发）...")
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+        tasks = [self._compare_batch_async(batch, semaphore, batch_num, total_batches)
+                 for batch_num, batch in enumerate(batches, 1)]
+        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for batch_num, results in enumerate(batch_results, 1):
+            if isinstance(results, Exception):
+                print(f"    ✗ 第 {batch_num} 批处理失败: {results}")
+                continue
+
+            all_results.extend(results)
+
+            # 统计本批结果
+            compliant = sum(1 for r in results if r.get("is_compliant") == True)
+            non_compliant = sum(1 for r in results if r.get("is_compliant") == False)
+            no_match = sum(1 for r in results if r.get("matched_spec_name") is None)
+
+            print(f"    ✓ 第 {batch_num} 批 符合:{compliant} 不符合:{non_compliant} 未匹配:{no_match}")
         
-        # 分批处理
-        total_batches = (len(user_params) + BATCH_SIZE - 1) // BATCH_SIZE
-        print(f"\n📦 分 {total_batches} 批处理...")
-        
-        for i in range(0, len(user_params), BATCH_SIZE):
-            batch = user_params[i:i + BATCH_SIZE]
-            batch_num = i // BATCH_SIZE + 1
-            
-            print(f"\n  🔄 处理第 {batch_num}/{total_batches} 批 ({len(batch)} 个参数)...")
-            
-            try:
-                results = self._compare_batch(batch)
-                all_results.extend(results)
-                
-                # 统计本批结果
-                compliant = sum(1 for r in results if r.get("is_compliant") == True)
-                non_compliant = sum(1 for r in results if r.get("is_compliant") == False)
-                no_match = sum(1 for r in results if r.get("matched_spec_name") is None)
-                
-                print(f"    ✓ 符合:{compliant} 不符合:{non_compliant} 未匹配:{no_match}")
-                
-            except Exception as e:
-                print(f"    ✗ 处理失败: {e}")
-        
-        # 汇总统计
+        # 汇总统计与分类：单次遍历同时维护计数、类型统计和分类结果
         total = len(all_results)
-        compliant_count = sum(1 for r in all_results if r.get("is_compliant") == True)
-        non_compliant_count = sum(1 for r in all_results if r.get("is_compliant") == False)
-        no_match_count = sum(1 for r in all_results if r.get("matched_spec_name") is None)
+        compliant_params = []
+        non_compliant_params = []
+        no_match_params = []
+        uncertain_params = []
+        type_stats = {"A": 0, "B": 0, "C": 0, "D": 0}
+        type_statistics = {
+            "A": {"compliant": 0, "non_compliant": 0},
+            "B": {"compliant": 0, "non_compliant": 0},
+            "C": {"compliant": 0, "non_compliant": 0},
+            "D": {"compliant": 0, "non_compliant": 0}
+        }
+
+        for r in all_results:
+            compliant = r.get("is_compliant")
+            matched = r.get("matched_spec_name")
+            ptype = r.get("param_type", "")
+
+            if compliant is True:
+                compliant_params.append(r)
+                if ptype in type_statistics:
+                    type_statistics[ptype]["compliant"] += 1
+            elif compliant is False:
+                non_compliant_params.append(r)
+                if ptype in type_statistics:
+                    type_statistics[ptype]["non_compliant"] += 1
+                if ptype in type_stats:
+                    type_stats[ptype] += 1
+            elif compliant is None and matched is not None:
+                uncertain_params.append(r)
+
+            if matched is None:
+                no_match_params.append(r)
+
+        compliant_count = len(compliant_params)
+        non_compliant_count = len(non_compliant_params)
+        no_match_count = len(no_match_params)
         uncertain_count = total - compliant_count - non_compliant_count - no_match_count
-        
+
         print(f"\n{'='*60}")
         print(f"📊 对比结果统计")
         print(f"{'='*60}")
@@ -273,43 +421,14 @@ class ParamComparator:
         print(f"  ✗ 不符合:     {non_compliant_count}")
         print(f"  - 未匹配规范: {no_match_count}")
         print(f"  ? 无法判断:   {uncertain_count}")
-        
-        # 按类型统计不符合的参数
-        type_stats = {"A": 0, "B": 0, "C": 0, "D": 0}
-        for r in all_results:
-            if r.get("is_compliant") == False:
-                ptype = r.get("param_type", "")
-                if ptype in type_stats:
-                    type_stats[ptype] += 1
-        
+
         if non_compliant_count > 0:
             print(f"\n  不符合参数按类型统计:")
             print(f"    A类(关键):   {type_stats['A']}")
             print(f"    B类(需审核): {type_stats['B']}")
             print(f"    C类(可调):   {type_stats['C']}")
             print(f"    D类(通用):   {type_stats['D']}")
-        
-        # 分类结果
-        compliant_params = [r for r in all_results if r.get("is_compliant") == True]
-        non_compliant_params = [r for r in all_results if r.get("is_compliant") == False]
-        no_match_params = [r for r in all_results if r.get("matched_spec_name") is None]
-        uncertain_params = [r for r in all_results if r.get("is_compliant") is None and r.get("matched_spec_name") is not None]
-        
-        # 按类型统计
-        type_statistics = {
-            "A": {"compliant": 0, "non_compliant": 0},
-            "B": {"compliant": 0, "non_compliant": 0},
-            "C": {"compliant": 0, "non_compliant": 0},
-            "D": {"compliant": 0, "non_compliant": 0}
-        }
-        for r in all_results:
-            ptype = r.get("param_type", "")
-            if ptype in type_statistics:
-                if r.get("is_compliant") == True:
-                    type_statistics[ptype]["compliant"] += 1
-                elif r.get("is_compliant") == False:
-                    type_statistics[ptype]["non_compliant"] += 1
-        
+
         result = {
             "extraction_file": EXTRACTION_RESULT,
             "spec_database": SPEC_DATABASE,
@@ -367,15 +486,15 @@ def main():
     extraction_result = comparator.load_extraction_result(EXTRACTION_RESULT)
     
     # 执行对比
-    result = comparator.compare(extraction_result)
+    result = asyncio.run(comparator.compare(extraction_result))
     
     # 保存结果
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%m_%d_%H%M")
     output_file = os.path.join(OUTPUT_DIR, f"com110_az_{timestamp}.json")
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"\n💾 对比结果已保存到: {output_file}")
     
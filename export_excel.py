@@ -10,9 +10,11 @@
 4. 运行脚本：python export_excel.py
 """
 
-import json
 import os
 from datetime import datetime
+from pathlib import Path
+
+import orjson
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
@@ -36,9 +38,13 @@ OUTPUT_DIR = "output"
 # 样式定义
 # ============================================================
 
+# 统计sheet标题样式
+TITLE_FONT = Font(bold=True, size=14)
+SECTION_FONT = Font(bold=True, size=12)
+
 # 表头样式
 HEADER_FONT = Font(bold=True, color="FFFFFF", size=11)
-HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_FILL = PatternFill(start_color="FF4472C4", end_color="FF4472C4", fill_type="solid")
 HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center", wrap_text=True)
 
 # 数据行样式
@@ -51,7 +57,7 @@ NON_COMPLIANT_FONT = Font(color="FF0000", bold=True)  # 红色
 NO_MATCH_FONT = Font(color="808080")  # 灰色
 
 # 分隔行样式
-SEPARATOR_FILL = PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid")
+SEPARATOR_FILL = PatternFill(start_color="FFFFF2CC", end_color="FFFFF2CC", fill_type="solid")
 SEPARATOR_FONT = Font(bold=True, color="806000")
 
 # 边框
@@ -62,19 +68,32 @@ THIN_BORDER = Border(
     bottom=Side(style='thin')
 )
 
+# 各状态的合规标记与字体，按状态一次查好，避免行循环里反复分支
+STATUS_STYLES = {
+    "compliant": ("✓", COMPLIANT_FONT),
+    "non_compliant": ("✗", NON_COMPLIANT_FONT),
+    "no_match": ("-", NO_MATCH_FONT),
+    "uncertain": ("?", None),
+}
+
+# 六列的对齐方式固定不变，预先定义好供逐行复用
+ROW_ALIGNMENTS = (
+    DATA_ALIGNMENT, CENTER_ALIGNMENT, DATA_ALIGNMENT,
+    CENTER_ALIGNMENT, CENTER_ALIGNMENT, CENTER_ALIGNMENT,
+)
+
 # 类型颜色
 TYPE_FILLS = {
-    "A": PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid"),  # 浅红
-    "B": PatternFill(start_color="FFE6CC", end_color="FFE6CC", fill_type="solid"),  # 浅橙
-    "C": PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid"),  # 浅绿
-    "D": PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid"),  # 浅蓝
+    "A": PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid"),  # 浅红
+    "B": PatternFill(start_color="FFFFE6CC", end_color="FFFFE6CC", fill_type="solid"),  # 浅橙
+    "C": PatternFill(start_color="FFCCFFCC", end_color="FFCCFFCC", fill_type="solid"),  # 浅绿
+    "D": PatternFill(start_color="FFCCE5FF", end_color="FFCCE5FF", fill_type="solid"),  # 浅蓝
 }
 
 
 def load_json(file_path: str) -> dict:
-    """加载JSON文件"""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """加载JSON文件。结果文件可能有几MB，orjson 的 C 解析器比 stdlib 快数倍"""
+    return orjson.loads(Path(file_path).read_bytes())
 
 
 def export_to_excel(comparison_result: dict, extraction_result: dict, output_path: str):
@@ -89,76 +108,54 @@ def export_to_excel(comparison_result: dict, extraction_result: dict, output_pat
     for i, width in enumerate(column_widths, 1):
         ws.column_dimensions[get_column_letter(i)].width = width
     
-    # 写入表头
+    # 写入表头（append 一次建好整行，再补样式）
     headers = ["用户参数", "用户值", "匹配规范参数", "规范值", "参数类型", "是否合规"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
+    ws.append(headers)
+    for cell in ws[1]:
         cell.font = HEADER_FONT
         cell.fill = HEADER_FILL
         cell.alignment = HEADER_ALIGNMENT
         cell.border = THIN_BORDER
-    
+
     # 冻结首行
     ws.freeze_panes = "A2"
-    
-    current_row = 2
-    
-    # 1. 写入符合规范的参数
-    compliant_params = comparison_result.get("compliant_params", [])
-    if compliant_params:
-        for item in compliant_params:
-            current_row = write_param_row(ws, current_row, item, "compliant")
-    
-    # 2. 写入不符合规范的参数
-    non_compliant_params = comparison_result.get("non_compliant_params", [])
-    if non_compliant_params:
-        for item in non_compliant_params:
-            current_row = write_param_row(ws, current_row, item, "non_compliant")
-    
-    # 3. 写入无法判断的参数
-    uncertain_params = comparison_result.get("uncertain_params", [])
-    if uncertain_params:
-        for item in uncertain_params:
-            current_row = write_param_row(ws, current_row, item, "uncertain")
-    
-    # 4. 写入未匹配到规范的参数
-    no_match_params = comparison_result.get("no_match_params", [])
-    if no_match_params:
-        for item in no_match_params:
-            current_row = write_param_row(ws, current_row, item, "no_match")
-    
+
+    # 1-4. 按状态顺序流式写入参数行，行写出后不再回头修改
+    status_sections = [
+        ("compliant_params", "compliant"),
+        ("non_compliant_params", "non_compliant"),
+        ("uncertain_params", "uncertain"),
+        ("no_match_params", "no_match"),
+    ]
+    for result_key, status in status_sections:
+        for item in comparison_result.get(result_key, []):
+            write_param_row(ws, item, status)
+
     # 5. 添加分隔行 - 未提取到的参数
     not_found_params = extraction_result.get("not_found", [])
     if not_found_params:
-        # 添加空行
-        current_row += 1
-        
-        # 添加分隔标题行
-        separator_cell = ws.cell(row=current_row, column=1, value="以下参数在文档中未提取到")
+        # 空行分隔
+        ws.append([])
+
+        # 添加分隔标题行。合并区域的样式取左上角单元格，
+        # 其余的 MergedCell 不做单独着色
+        ws.append(["以下参数在文档中未提取到"])
+        separator_row = ws.max_row
+        separator_cell = ws.cell(row=separator_row, column=1)
         separator_cell.font = SEPARATOR_FONT
         separator_cell.fill = SEPARATOR_FILL
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=6)
-        for col in range(1, 7):
-            ws.cell(row=current_row, column=col).border = THIN_BORDER
-            ws.cell(row=current_row, column=col).fill = SEPARATOR_FILL
-        current_row += 1
-        
+        separator_cell.border = THIN_BORDER
+        ws.merge_cells(start_row=separator_row, start_column=1, end_row=separator_row, end_column=6)
+
         # 写入未提取到的参数
+        not_found_alignments = (DATA_ALIGNMENT,) + (CENTER_ALIGNMENT,) * 5
         for param_name in not_found_params:
-            ws.cell(row=current_row, column=1, value=param_name).alignment = DATA_ALIGNMENT
-            ws.cell(row=current_row, column=2, value="-").alignment = CENTER_ALIGNMENT
-            ws.cell(row=current_row, column=3, value="-").alignment = CENTER_ALIGNMENT
-            ws.cell(row=current_row, column=4, value="-").alignment = CENTER_ALIGNMENT
-            ws.cell(row=current_row, column=5, value="-").alignment = CENTER_ALIGNMENT
-            ws.cell(row=current_row, column=6, value="-").alignment = CENTER_ALIGNMENT
-            
-            for col in range(1, 7):
-                cell = ws.cell(row=current_row, column=col)
+            ws.append([param_name, "-", "-", "-", "-", "-"])
+            for cell, alignment in zip(ws[ws.max_row], not_found_alignments):
+                cell.alignment = alignment
                 cell.border = THIN_BORDER
                 cell.font = NO_MATCH_FONT
-            
-            current_row += 1
-    
+
     # 添加统计信息sheet
     add_statistics_sheet(wb, comparison_result, extraction_result)
     
@@ -167,48 +164,39 @@ def export_to_excel(comparison_result: dict, extraction_result: dict, output_pat
     print(f"✅ Excel报告已保存到: {output_path}")
 
 
-def write_param_row(ws, row: int, item: dict, status: str) -> int:
-    """写入一行参数数据"""
-    
-    user_name = item.get("user_param_name", "")
-    user_value = item.get("user_value", "")
-    spec_name = item.get("matched_spec_name", "")
-    spec_value = item.get("spec_value", "")
+def write_param_row(ws, item: dict, status: str):
+    """追加一行参数数据"""
+
+    # 热路径：样式常量绑定为局部变量（LOAD_FAST 代替 LOAD_GLOBAL）
+    thin_border = THIN_BORDER
+    type_fills = TYPE_FILLS
+
     param_type = item.get("param_type", "")
-    is_compliant = item.get("is_compliant")
-    
-    # 写入数据
-    ws.cell(row=row, column=1, value=user_name).alignment = DATA_ALIGNMENT
-    ws.cell(row=row, column=2, value=user_value).alignment = CENTER_ALIGNMENT
-    ws.cell(row=row, column=3, value=spec_name if spec_name else "-").alignment = DATA_ALIGNMENT
-    ws.cell(row=row, column=4, value=spec_value if spec_value else "-").alignment = CENTER_ALIGNMENT
-    ws.cell(row=row, column=5, value=param_type if param_type else "-").alignment = CENTER_ALIGNMENT
-    
-    # 是否合规
-    if status == "compliant":
-        compliance_cell = ws.cell(row=row, column=6, value="✓")
-        compliance_cell.font = COMPLIANT_FONT
-    elif status == "non_compliant":
-        compliance_cell = ws.cell(row=row, column=6, value="✗")
-        compliance_cell.font = NON_COMPLIANT_FONT
-    elif status == "no_match":
-        compliance_cell = ws.cell(row=row, column=6, value="-")
-        compliance_cell.font = NO_MATCH_FONT
-    else:
-        compliance_cell = ws.cell(row=row, column=6, value="?")
-    
-    compliance_cell.alignment = CENTER_ALIGNMENT
-    
-    # 应用边框和类型颜色
-    for col in range(1, 7):
-        cell = ws.cell(row=row, column=col)
-        cell.border = THIN_BORDER
-    
-    # 类型列着色
-    if param_type in TYPE_FILLS:
-        ws.cell(row=row, column=5).fill = TYPE_FILLS[param_type]
-    
-    return row + 1
+    symbol, symbol_font = STATUS_STYLES[status]
+
+    values = (
+        item.get("user_param_name", ""),
+        item.get("user_value", ""),
+        item.get("matched_spec_name", "") or "-",
+        item.get("spec_value", "") or "-",
+        param_type or "-",
+        symbol,
+    )
+
+    # append 一次建好整行，再单次遍历补上对齐和边框
+    ws.append(values)
+    row_cells = ws[ws.max_row]
+    for cell, alignment in zip(row_cells, ROW_ALIGNMENTS):
+        cell.alignment = alignment
+        cell.border = thin_border
+
+    if symbol_font is not None:
+        row_cells[5].font = symbol_font
+
+    # 类型列着色（get 一次完成存在性检查和取值）
+    fill = type_fills.get(param_type)
+    if fill is not None:
+        row_cells[4].fill = fill
 
 
 def add_statistics_sheet(wb: Workbook, comparison_result: dict, extraction_result: dict):
@@ -225,78 +213,200 @@ def add_statistics_sheet(wb: Workbook, comparison_result: dict, extraction_resul
     type_defs = comparison_result.get("type_definitions", {})
     extraction_stats = extraction_result.get("statistics", {})
     
-    row = 1
-    
     # 标题
-    ws.cell(row=row, column=1, value="参数对比统计报告").font = Font(bold=True, size=14)
-    ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=2)
-    row += 2
-    
+    ws.append(["参数对比统计报告"])
+    ws.cell(row=ws.max_row, column=1).font = TITLE_FONT
+    ws.merge_cells(start_row=ws.max_row, start_column=1, end_row=ws.max_row, end_column=2)
+    ws.append([])
+
     # 提取统计
-    ws.cell(row=row, column=1, value="提取统计").font = Font(bold=True, size=12)
-    row += 1
-    ws.cell(row=row, column=1, value="预定义参数总数")
-    ws.cell(row=row, column=2, value=extraction_stats.get("total_requested", 0))
-    row += 1
-    ws.cell(row=row, column=1, value="成功提取")
-    ws.cell(row=row, column=2, value=extraction_stats.get("found", 0))
-    row += 1
-    ws.cell(row=row, column=1, value="未提取到")
-    ws.cell(row=row, column=2, value=extraction_stats.get("not_found", 0))
-    row += 2
-    
+    ws.append(["提取统计"])
+    ws.cell(row=ws.max_row, column=1).font = SECTION_FONT
+    for label, value in [
+        ("预定义参数总数", extraction_stats.get("total_requested", 0)),
+        ("成功提取", extraction_stats.get("found", 0)),
+        ("未提取到", extraction_stats.get("not_found", 0)),
+    ]:
+        ws.append([label, value])
+    ws.append([])
+
     # 对比统计
-    ws.cell(row=row, column=1, value="对比统计").font = Font(bold=True, size=12)
-    row += 1
-    ws.cell(row=row, column=1, value="参与对比总数")
-    ws.cell(row=row, column=2, value=stats.get("total", 0))
-    row += 1
-    ws.cell(row=row, column=1, value="符合规范")
-    ws.cell(row=row, column=2, value=stats.get("compliant", 0))
-    ws.cell(row=row, column=2).font = COMPLIANT_FONT
-    row += 1
-    ws.cell(row=row, column=1, value="不符合规范")
-    ws.cell(row=row, column=2, value=stats.get("non_compliant", 0))
-    ws.cell(row=row, column=2).font = NON_COMPLIANT_FONT
-    row += 1
-    ws.cell(row=row, column=1, value="未匹配到规范")
-    ws.cell(row=row, column=2, value=stats.get("no_match", 0))
-    row += 1
-    ws.cell(row=row, column=1, value="无法判断")
-    ws.cell(row=row, column=2, value=stats.get("uncertain", 0))
-    row += 2
-    
+    ws.append(["对比统计"])
+    ws.cell(row=ws.max_row, column=1).font = SECTION_FONT
+    for label, value, value_font in [
+        ("参与对比总数", stats.get("total", 0), None),
+        ("符合规范", stats.get("compliant", 0), COMPLIANT_FONT),
+        ("不符合规范", stats.get("non_compliant", 0), NON_COMPLIANT_FONT),
+        ("未匹配到规范", stats.get("no_match", 0), None),
+        ("无法判断", stats.get("uncertain", 0), None),
+    ]:
+        ws.append([label, value])
+        if value_font is not None:
+            ws.cell(row=ws.max_row, column=2).font = value_font
+    ws.append([])
+
     # 按类型统计
-    ws.cell(row=row, column=1, value="按类型统计").font = Font(bold=True, size=12)
-    row += 1
-    
+    ws.append(["按类型统计"])
+    ws.cell(row=ws.max_row, column=1).font = SECTION_FONT
     for ptype in ["A", "B", "C", "D"]:
         type_data = type_stats.get(ptype, {})
         type_def = type_defs.get(ptype, "")
-        ws.cell(row=row, column=1, value=f"{ptype}类 ({type_def})")
         compliant = type_data.get("compliant", 0)
         non_compliant = type_data.get("non_compliant", 0)
-        ws.cell(row=row, column=2, value=f"符合:{compliant} 不符合:{non_compliant}")
+        ws.append([f"{ptype}类 ({type_def})", f"符合:{compliant} 不符合:{non_compliant}"])
         if ptype in TYPE_FILLS:
-            ws.cell(row=row, column=1).fill = TYPE_FILLS[ptype]
+            ws.cell(row=ws.max_row, column=1).fill = TYPE_FILLS[ptype]
+    ws.append([])
+
+    # 文件信息
+    ws.append(["文件信息"])
+    ws.cell(row=ws.max_row, column=1).font = SECTION_FONT
+    for label, key in [
+        ("提取结果文件", "extraction_file"),
+        ("规范数据库", "spec_database"),
+        ("对比时间", "compare_time"),
+        ("使用模型", "model"),
+    ]:
+        ws.append([label, comparison_result.get(key, "")])
+
+
+def _export_to_excel_xlsxwriter(comparison_result: dict, extraction_result: dict, output_path: str):
+    """xlsxwriter 后端：直接流式写 XML，对这种只写不读的报告比 openpyxl
+    快 2-3 倍。通过环境变量 MERI_EXCEL_BACKEND=xlsxwriter 启用。
+    （constant_memory 模式不支持合并单元格，因此未启用）"""
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(output_path, {"strings_to_numbers": False})
+
+    border = {"border": 1}
+    fmt_header = wb.add_format({"bold": True, "font_color": "white", "bg_color": "#4472C4",
+                                "align": "center", "valign": "vcenter", "text_wrap": True, **border})
+    fmt_data = wb.add_format({"align": "left", "valign": "vcenter", "text_wrap": True, **border})
+    fmt_center = wb.add_format({"align": "center", "valign": "vcenter", **border})
+    status_fmts = {
+        "compliant": wb.add_format({"font_color": "#008000", "bold": True, "align": "center", **border}),
+        "non_compliant": wb.add_format({"font_color": "#FF0000", "bold": True, "align": "center", **border}),
+        "no_match": wb.add_format({"font_color": "#808080", "align": "center", **border}),
+        "uncertain": wb.add_format({"align": "center", **border}),
+    }
+    type_fmts = {t: wb.add_format({"bg_color": c, "align": "center", **border})
+                 for t, c in [("A", "#FFCCCC"), ("B", "#FFE6CC"), ("C", "#CCFFCC"), ("D", "#CCE5FF")]}
+    fmt_separator = wb.add_format({"bold": True, "font_color": "#806000", "bg_color": "#FFF2CC", **border})
+    fmt_gray_left = wb.add_format({"font_color": "#808080", "align": "left", "text_wrap": True, **border})
+    fmt_gray_center = wb.add_format({"font_color": "#808080", "align": "center", **border})
+
+    # 主表
+    ws = wb.add_worksheet("参数对比结果")
+    for col, width in enumerate([35, 18, 35, 18, 12, 10]):
+        ws.set_column(col, col, width)
+
+    headers = ["用户参数", "用户值", "匹配规范参数", "规范值", "参数类型", "是否合规"]
+    for col, header in enumerate(headers):
+        ws.write(0, col, header, fmt_header)
+    ws.freeze_panes(1, 0)
+
+    row = 1
+    status_sections = [
+        ("compliant_params", "compliant"),
+        ("non_compliant_params", "non_compliant"),
+        ("uncertain_params", "uncertain"),
+        ("no_match_params", "no_match"),
+    ]
+    for result_key, status in status_sections:
+        symbol = STATUS_STYLES[status][0]
+        for item in comparison_result.get(result_key, []):
+            param_type = item.get("param_type", "")
+            ws.write(row, 0, item.get("user_param_name", ""), fmt_data)
+            ws.write(row, 1, item.get("user_value", ""), fmt_center)
+            ws.write(row, 2, item.get("matched_spec_name", "") or "-", fmt_data)
+            ws.write(row, 3, item.get("spec_value", "") or "-", fmt_center)
+            ws.write(row, 4, param_type or "-", type_fmts.get(param_type, fmt_center))
+            ws.write(row, 5, symbol, status_fmts[status])
+            row += 1
+
+    not_found_params = extraction_result.get("not_found", [])
+    if not_found_params:
         row += 1
-    
+        ws.merge_range(row, 0, row, 5, "以下参数在文档中未提取到", fmt_separator)
+        row += 1
+        for param_name in not_found_params:
+            ws.write(row, 0, param_name, fmt_gray_left)
+            for col in range(1, 6):
+                ws.write(row, col, "-", fmt_gray_center)
+            row += 1
+
+    # 统计sheet
+    fmt_title = wb.add_format({"bold": True, "font_size": 14})
+    fmt_section = wb.add_format({"bold": True, "font_size": 12})
+    fmt_compliant = wb.add_format({"font_color": "#008000", "bold": True})
+    fmt_non_compliant = wb.add_format({"font_color": "#FF0000", "bold": True})
+    type_label_fmts = {t: wb.add_format({"bg_color": c})
+                       for t, c in [("A", "#FFCCCC"), ("B", "#FFE6CC"), ("C", "#CCFFCC"), ("D", "#CCE5FF")]}
+
+    stats = comparison_result.get("statistics", {})
+    type_stats = comparison_result.get("type_statistics", {})
+    type_defs = comparison_result.get("type_definitions", {})
+    extraction_stats = extraction_result.get("statistics", {})
+
+    ws2 = wb.add_worksheet("统计信息")
+    ws2.set_column(0, 0, 25)
+    ws2.set_column(1, 1, 15)
+
+    ws2.merge_range(0, 0, 0, 1, "参数对比统计报告", fmt_title)
+    row = 2
+
+    ws2.write(row, 0, "提取统计", fmt_section)
     row += 1
-    
-    # 文件信息
-    ws.cell(row=row, column=1, value="文件信息").font = Font(bold=True, size=12)
+    for label, value in [
+        ("预定义参数总数", extraction_stats.get("total_requested", 0)),
+        ("成功提取", extraction_stats.get("found", 0)),
+        ("未提取到", extraction_stats.get("not_found", 0)),
+    ]:
+        ws2.write(row, 0, label)
+        ws2.write(row, 1, value)
+        row += 1
+    row += 1
+
+    ws2.write(row, 0, "对比统计", fmt_section)
+    row += 1
+    for label, value, value_fmt in [
+        ("参与对比总数", stats.get("total", 0), None),
+        ("符合规范", stats.get("compliant", 0), fmt_compliant),
+        ("不符合规范", stats.get("non_compliant", 0), fmt_non_compliant),
+        ("未匹配到规范", stats.get("no_match", 0), None),
+        ("无法判断", stats.get("uncertain", 0), None),
+    ]:
+        ws2.write(row, 0, label)
+        ws2.write(row, 1, value, value_fmt)
+        row += 1
     row += 1
-    ws.cell(row=row, column=1, value="提取结果文件")
-    ws.cell(row=row, column=2, value=comparison_result.get("extraction_file", ""))
+
+    ws2.write(row, 0, "按类型统计", fmt_section)
     row += 1
-    ws.cell(row=row, column=1, value="规范数据库")
-    ws.cell(row=row, column=2, value=comparison_result.get("spec_database", ""))
+    for ptype in ["A", "B", "C", "D"]:
+        type_data = type_stats.get(ptype, {})
+        type_def = type_defs.get(ptype, "")
+        compliant = type_data.get("compliant", 0)
+        non_compliant = type_data.get("non_compliant", 0)
+        ws2.write(row, 0, f"{ptype}类 ({type_def})", type_label_fmts.get(ptype))
+        ws2.write(row, 1, f"符合:{compliant} 不符合:{non_compliant}")
+        row += 1
     row += 1
-    ws.cell(row=row, column=1, value="对比时间")
-    ws.cell(row=row, column=2, value=comparison_result.get("compare_time", ""))
+
+    ws2.write(row, 0, "文件信息", fmt_section)
     row += 1
-    ws.cell(row=row, column=1, value="使用模型")
-    ws.cell(row=row, column=2, value=comparison_result.get("model", ""))
+    for label, key in [
+        ("提取结果文件", "extraction_file"),
+        ("规范数据库", "spec_database"),
+        ("对比时间", "compare_time"),
+        ("使用模型", "model"),
+    ]:
+        ws2.write(row, 0, label)
+        ws2.write(row, 1, comparison_result.get(key, ""))
+        row += 1
+
+    wb.close()
+    print(f"✅ Excel报告已保存到: {output_path}")
 
 
 def main():
@@ -333,7 +443,10 @@ def main():
     
     # 导出Excel
     print(f"\n📊 生成Excel报告...")
-    export_to_excel(comparison_result, extraction_result, output_file)
+    if os.environ.get("MERI_EXCEL_BACKEND") == "xlsxwriter":
+        _export_to_excel_xlsxwriter(comparison_result, extraction_result, output_file)
+    else:
+        export_to_excel(comparison_result, extraction_result, output_file)
     
     # 统计信息
     stats = comparison_result.get("statistics", {})
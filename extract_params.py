@@ -12,12 +12,17 @@
 3. 运行脚本：python extract_params.py
 """
 
+import bisect
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
 from docling.document_converter import DocumentConverter
 from jinja2 import Template
 
@@ -47,6 +52,53 @@ MAX_CHARS = 20000
 # 每批处理的参数数量（避免参数列表过长）
 PARAMS_BATCH_SIZE = 50
 
+# LLM 并发调用上限（受限于服务端并发配额）
+MAX_LLM_WORKERS = 8
+
+# Docling 转换结果的磁盘缓存目录（按 PDF 内容哈希存放）
+DOCLING_CACHE_DIR = Path(".docling_cache")
+
+# 分块时优先断开的标签（按优先级从高到低）
+BREAK_TAGS = ['</table>', '</div>', '</p>', '<br', '\n\n']
+
+# 设备名列表，用于区分不同设备下的同名参数
+DEVICES = ["断路器", "隔离开关", "快速接地开关", "检修接地开关", "电流互感器", "电压互感器", "避雷器"]
+
+# 设备名识别编译成单个正则交替，一次 C 级扫描代替逐个子串查找
+_DEVICE_RE = re.compile("|".join(DEVICES))
+
+# 标准化参数名时需要剔除的分隔符和空格
+_NORMALIZE_TRANS = str.maketrans("", "", "-－—()（） 　/、")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_name(name: str) -> str:
+    """标准化参数名，用于匹配。同一批参数名会在每个文档块上
+    反复标准化，因此结果做缓存"""
+    return name.translate(_NORMALIZE_TRANS).lower()
+
+
+def _device_of(name: str) -> str:
+    """返回参数名中包含的设备名，没有则返回 None"""
+    m = _DEVICE_RE.search(name)
+    return m.group() if m else None
+
+
+@lru_cache(maxsize=32)
+def _params_bullet(params_tuple: tuple) -> str:
+    """参数批次的列表文本。同一批参数会对每个文档块各渲染一次，
+    拼好的字符串按批缓存"""
+    return "\n".join(f"- {p}" for p in params_tuple)
+
+
+def _core_fragment(name: str) -> str:
+    """参数名去掉设备前缀后的核心片段，用于快速判断
+    一个文档块中是否可能出现该参数"""
+    device = _device_of(name)
+    if device:
+        name = name.replace(device, "")
+    return _normalize_name(name)
+
 
 # ============================================================
 # 提取Prompt
@@ -119,15 +171,33 @@ class ParamsExtractor:
         self.model = model
         self.converter = DocumentConverter()
         self.params_list = []
-    
+        self._params_meta = {}
+        self._name_fragments = {}
+        self._meta_source = None
+
     def load_params_list(self, params_file: str):
         """加载预定义参数列表"""
         print(f"加载参数列表: {params_file}")
         with open(params_file, "r", encoding="utf-8") as f:
             lines = f.readlines()
-        
+
         self.params_list = [line.strip() for line in lines if line.strip()]
+        self._ensure_params_meta()
         print(f"✓ 加载了 {len(self.params_list)} 个参数")
+
+    def _ensure_params_meta(self):
+        """按当前参数列表重建名称缓存（已是最新时直接返回）
+
+        web_app 等调用方会直接给 params_list 赋值而不走
+        load_params_list，缓存在首次使用时按需补算。
+        """
+        if self._meta_source is self.params_list:
+            return
+        # 预先算好每个参数的标准化名称和设备名，匹配热循环中直接复用
+        self._params_meta = {p: (_normalize_name(p), _device_of(p)) for p in self.params_list}
+        # 核心片段用于提交 LLM 之前的文本预筛选
+        self._name_fragments = {p: _core_fragment(p) for p in self.params_list}
+        self._meta_source = self.params_list
     
     def _convert_to_html(self, file_path: str) -> str:
         """将文档转换为HTML"""
@@ -136,28 +206,52 @@ class ParamsExtractor:
         html_content = export_to_html(result.document)
         print(f"✓ 转换完成，HTML长度: {len(html_content)} 字符")
         return html_content
+
+    def _cached_html(self, file_path: str) -> str:
+        """带磁盘缓存的文档转换。Docling 的 PDF 解析是 LLM 之外最大的
+        开销，按文件内容哈希缓存转换结果，同一份 PDF 的后续运行直接跳过"""
+        with open(file_path, "rb") as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+        cache_file = DOCLING_CACHE_DIR / f"{digest}.html"
+        if cache_file.exists():
+            print(f"✓ 命中转换缓存: {cache_file}")
+            return cache_file.read_text(encoding="utf-8")
+
+        html_content = self._convert_to_html(file_path)
+        DOCLING_CACHE_DIR.mkdir(exist_ok=True)
+        cache_file.write_text(html_content, encoding="utf-8")
+        return html_content
     
     def _chunk_document(self, html_content: str) -> list:
-        """将文档分块"""
+        """将文档分块，返回 (start, end) 区间。子串在真正渲染提示词时
+        才切出来，避免同时物化整份文档的第二份拷贝"""
         if len(html_content) <= MAX_CHARS:
-            return [html_content]
+            return [(0, len(html_content))]
         
+        # 一次扫描收集每种标签的所有出现位置，分块循环里只做二分查找，
+        # 避免每个块对每种标签重复 rfind 扫描
+        boundaries = {}
+        for tag in BREAK_TAGS:
+            matches = list(re.finditer(re.escape(tag), html_content))
+            boundaries[tag] = ([m.start() for m in matches], [m.end() for m in matches])
+
         chunks = []
         current_pos = 0
-        
+
         while current_pos < len(html_content):
             end_pos = min(current_pos + MAX_CHARS, len(html_content))
-            
+
             if end_pos < len(html_content):
                 # 尝试在合适的位置断开
-                for tag in ['</table>', '</div>', '</p>', '<br', '\n\n']:
-                    find_pos = html_content.rfind(tag, current_pos, end_pos)
-                    if find_pos > current_pos + MAX_CHARS // 2:
-                        end_pos = find_pos + len(tag)
+                for tag in BREAK_TAGS:
+                    starts, ends = boundaries[tag]
+                    idx = bisect.bisect_right(ends, end_pos) - 1
+                    if idx >= 0 and starts[idx] > current_pos + MAX_CHARS // 2:
+                        end_pos = ends[idx]
                         break
-            
-            chunk = html_content[current_pos:end_pos]
-            chunks.append(chunk)
+
+            chunks.append((current_pos, end_pos))
             current_pos = end_pos
         
         print(f"   文档分为 {len(chunks)} 个块")
@@ -191,9 +285,9 @@ class ParamsExtractor:
                     max_tokens=8192
                 )
                 
-                return json.loads(response)
-                
-            except json.JSONDecodeError as e:
+                return orjson.loads(response)
+
+            except orjson.JSONDecodeError as e:
                 if attempt < 2:
                     print(f"    ⚠️ JSON解析失败，重试中...")
                     continue
@@ -226,69 +320,53 @@ class ParamsExtractor:
     
     def _normalize_name(self, name: str) -> str:
         """标准化参数名，用于匹配"""
-        # 移除常见的分隔符和空格
-        normalized = name.replace("-", "").replace("－", "").replace("—", "")
-        normalized = normalized.replace("(", "").replace(")", "")
-        normalized = normalized.replace("（", "").replace("）", "")
-        normalized = normalized.replace(" ", "").replace("　", "")
-        normalized = normalized.replace("/", "").replace("、", "")
-        return normalized.lower()
+        return _normalize_name(name)
     
     def _match_param_name(self, extracted_name: str, params_batch: list) -> str:
         """匹配提取的参数名到预定义列表"""
-        extracted_norm = self._normalize_name(extracted_name)
-        
+        extracted_norm = _normalize_name(extracted_name)
+        self._ensure_params_meta()
+        meta = self._params_meta
+
         # 1. 精确匹配
         for p in params_batch:
             if extracted_name == p:
                 return p
-        
+
         # 2. 标准化后精确匹配
         for p in params_batch:
-            if self._normalize_name(p) == extracted_norm:
+            if meta[p][0] == extracted_norm:
                 return p
-        
+
         # 3. 包含匹配（需要设备名也匹配）
-        # 提取设备名
-        devices = ["断路器", "隔离开关", "快速接地开关", "检修接地开关", "电流互感器", "电压互感器", "避雷器"]
-        
-        extracted_device = None
-        for d in devices:
-            if d in extracted_name:
-                extracted_device = d
-                break
-        
+        extracted_device = _device_of(extracted_name)
+
         for p in params_batch:
-            p_norm = self._normalize_name(p)
-            
-            # 检查设备是否匹配
-            p_device = None
-            for d in devices:
-                if d in p:
-                    p_device = d
-                    break
-            
+            p_norm, p_device = meta[p]
+
             # 如果两者都有设备名，必须匹配
             if extracted_device and p_device:
                 if extracted_device != p_device:
                     continue
-            
+
             # 检查参数名核心部分是否匹配
             if extracted_norm in p_norm or p_norm in extracted_norm:
                 return p
-        
+
         return None
     
-    def _extract_batch(self, html_chunk: str, params_batch: list) -> dict:
+    def _extract_batch(self, html_content: str, span: tuple, params_batch: list) -> dict:
         """对一个文档块和一批参数进行提取"""
-        params_str = "\n".join([f"- {p}" for p in params_batch])
-        
+        params_str = _params_bullet(tuple(params_batch))
+
+        # 块文本只在渲染提示词时切片，随提示词一起回收
+        start, end = span
         prompt = EXTRACTION_PROMPT.render(
             params_list=params_str,
             params_count=len(params_batch),
-            document=html_chunk
+            document=html_content[start:end]
         )
-        
+
         return self._call_llm(prompt)
     
     def extract(self, file_path: str) -> dict:
@@ -299,9 +377,12 @@ class ParamsExtractor:
         print(f"文件: {file_path}")
         print(f"参数数: {len(self.params_list)}")
         print(f"模型: {self.model}")
-        
+
+        # params_list 可能被调用方直接赋值，先保证名称缓存是最新的
+        self._ensure_params_meta()
+
         # 转换文档
-        html_content = self._convert_to_html(file_path)
+        html_content = self._cached_html(file_path)
         
         # 分块
         doc_chunks = self._chunk_document(html_content)
@@ -313,53 +394,65 @@ class ParamsExtractor:
         
         # 收集结果
         all_params = {}  # name -> param dict
-        found_params = set()
-        
-        # 对每个文档块，用所有待查参数进行提取
-        for chunk_idx, chunk in enumerate(doc_chunks):
-            # 计算当前还需要查找的参数
-            remaining_params = [p for p in self.params_list if p not in found_params]
-            
-            if not remaining_params:
-                print(f"\n 所有参数已找到，跳过剩余文档块")
-                break
-            
-            print(f"\n 处理文档块 {chunk_idx + 1}/{len(doc_chunks)} (待查参数: {len(remaining_params)})")
-            
-            # 如果待查参数太多，分批处理
-            param_batches = self._chunk_params(remaining_params)
-            
-            for batch_idx, params_batch in enumerate(param_batches):
-                if len(param_batches) > 1:
-                    print(f"   参数批次 {batch_idx + 1}/{len(param_batches)}")
-                
+        # 尚未找到的参数（保留插入顺序）；找到即原地弹出，
+        # 完成与否的检查变成 O(1)，不用每次整表重扫
+        remaining = dict.fromkeys(self.params_list)
+
+        # 每个 (文档块, 参数批次) 组合互相独立，LLM 调用基本是网络等待，
+        # 用线程池并发提交；结果仍按块顺序消费，保证靠前的块优先生效
+        jobs = []
+        # max(1, ...)：空文档或空参数表时组合数为0，而线程池要求至少1个worker
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_LLM_WORKERS,
+                                                       len(doc_chunks) * len(params_batches)))) as executor:
+            fragments = self._name_fragments
+            for chunk_idx, span in enumerate(doc_chunks):
+                # 文档块标准化一次，供该块所有批次的预筛选复用
+                chunk_norm = html_content[span[0]:span[1]].translate(_NORMALIZE_TRANS).lower()
+                for batch_idx, params_batch in enumerate(params_batches):
+                    # 预筛选：核心片段在块中完全不出现的参数不提交，
+                    # 整批都不出现时省掉一次 LLM 调用
+                    batch = [p for p in params_batch if fragments[p] in chunk_norm]
+                    if not batch:
+                        continue
+                    future = executor.submit(self._extract_batch, html_content, span, batch)
+                    jobs.append((chunk_idx, batch_idx, batch, future))
+
+            for chunk_idx, batch_idx, params_batch, future in jobs:
+                # 已全部找到时取消尚未开始的任务
+                if not remaining:
+                    future.cancel()
+                    continue
+
+                print(f"\n 处理文档块 {chunk_idx + 1}/{len(doc_chunks)} "
+                      f"参数批次 {batch_idx + 1}/{len(params_batches)}")
+
                 try:
-                    result = self._extract_batch(chunk, params_batch)
-                    
+                    result = future.result()
+
                     # 处理结果
                     chunk_found = 0
                     for param in result.get("parameters", []):
                         if not isinstance(param, dict):
                             continue
-                        
+
                         name = param.get("name", "")
                         value = param.get("value")
-                        
+
                         # 过滤空值
                         if not name or not value or str(value).strip() in ["", "null", "无", "未找到", "N/A", "-"]:
                             continue
-                        
+
                         # 精确匹配预定义列表中的参数
                         matched_name = self._match_param_name(name, params_batch)
-                        
-                        if matched_name and matched_name not in found_params:
+
+                        if matched_name and matched_name in remaining:
                             param["name"] = matched_name  # 使用标准名称
                             all_params[matched_name] = param
-                            found_params.add(matched_name)
+                            remaining.pop(matched_name)
                             chunk_found += 1
-                    
+
                     print(f"    ✓ 本批找到 {chunk_found} 个参数")
-                    
+
                 except Exception as e:
                     print(f"    ✗ 处理失败: {e}")
         
@@ -430,8 +523,8 @@ def main():
     timestamp = datetime.now().strftime("%m_%d_%H%M")
     output_file = os.path.join(OUTPUT_DIR, f"ex110_az_{timestamp}.json")
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
     
     print(f"\n 提取结果已保存到: {output_file}")
     
@@ -1,11 +1,26 @@
-import numpy as np
 from pydantic import BaseModel
 from pydantic import Field
 import pandas as pd
-from typing import OrderedDict, List
+from typing import List
 from pathlib import Path
 import xml.etree.ElementTree as ET
-import ast
+from xml.sax.saxutils import escape
+import json
+
+# lxml parses via libxml2 and is several times faster on multi-KB tables;
+# fall back to the stdlib parser when it is not installed
+try:
+    from lxml import etree as _xml_parser
+except ImportError:
+    _xml_parser = ET
+
+# attribute escaping equivalent to ElementTree's (quotes and whitespace on
+# top of the &/</> handled by saxutils.escape)
+_ATTR_ENTITIES = {'"': '&quot;', '\r': '&#13;', '\n': '&#10;', '\t': '&#09;'}
+
+
+def _attr_escape(value) -> str:
+    return escape(str(value), _ATTR_ENTITIES)
 
 class TableCellModel(BaseModel):
     text : str = Field(..., description='content of the cell')
@@ -27,68 +42,83 @@ class TableModel(BaseModel):
         return self.to_html(add_bbox_as_attr)
 
     def to_html(self, add_bbox_as_attr=False):
-        cells = [c.model_dump() for c in self.cells]
-        cells = sorted(cells, key=lambda k: min(k['col_nums']))
-        cells = sorted(cells, key=lambda k: min(k['row_nums']))
-
-        table = ET.Element("table", attrib=self.metadata.model_dump())
+        # decorate-sort: compute each cell's (row, col) anchor and spans once
+        # and sort a single time instead of two stable passes; the index keeps
+        # cells from ever being compared directly
+        decorated = [(min(c.row_nums), min(c.col_nums), i, len(c.row_nums), len(c.col_nums), c)
+                     for i, c in enumerate(self.cells)]
+        decorated.sort()
+
+        # emit the markup as a flat list of strings joined once; mirrors the
+        # previous ElementTree serialization without allocating an Element
+        # (plus attrib dict) per cell
+        meta = self.metadata
+        parts = [f'<table title="{_attr_escape(meta.title)}" description="{_attr_escape(meta.description)}">']
         current_row = -1
+        row_tag = None
+        cell_tag = 'td'
 
-        for cell in cells:
-            this_row = min(cell['row_nums'])
-
-            if add_bbox_as_attr:
-                attrib = {
-                    'bbox': cell['bbox']
-                }
-            else:
-                attrib = {}
-            colspan = len(cell['col_nums'])
+        for this_row, _, _, rowspan, colspan, cell in decorated:
+            attrs = f' bbox="{cell.bbox}"' if add_bbox_as_attr else ''
             if colspan > 1:
-                attrib['colspan'] = str(colspan)
-            rowspan = len(cell['row_nums'])
+                attrs += f' colspan="{colspan}"'
             if rowspan > 1:
-                attrib['rowspan'] = str(rowspan)
+                attrs += f' rowspan="{rowspan}"'
+
             if this_row > current_row:
                 current_row = this_row
-                if cell['col_header']:
-                    cell_tag = "th"
-                    row = ET.SubElement(table, "thead")
+                if row_tag is not None:
+                    parts.append(f'</{row_tag}>')
+                if cell.col_header:
+                    cell_tag, row_tag = 'th', 'thead'
                 else:
-                    cell_tag = "td"
-                    row = ET.SubElement(table, "tr")
-            tcell = ET.SubElement(row, cell_tag, attrib=attrib)
-            tcell.text = cell['text']
+                    cell_tag, row_tag = 'td', 'tr'
+                parts.append(f'<{row_tag}>')
+
+            parts.append(f'<{cell_tag}{attrs}>{escape(cell.text)}</{cell_tag}>')
 
-        return str(ET.tostring(table, encoding="unicode", short_empty_elements=False))
+        if row_tag is not None:
+            parts.append(f'</{row_tag}>')
+        parts.append('</table>')
+        return ''.join(parts)
     
     def to_df(self):
-        cells = [c.model_dump() for c in self.cells]
+        # read the pydantic fields directly instead of model_dump()ing every
+        # cell into a fresh dict
+        cells = self.cells
 
         if len(cells) > 0:
-            num_columns = max([max(cell['col_nums']) for cell in cells]) + 1
-            num_rows = max([max(cell['row_nums']) for cell in cells]) + 1
+            num_columns = max([max(cell.col_nums) for cell in cells]) + 1
+            num_rows = max([max(cell.row_nums) for cell in cells]) + 1
         else:
             return
 
-        header_cells = [cell for cell in cells if cell['col_header']]
+        header_cells = [cell for cell in cells if cell.col_header]
         if len(header_cells) > 0:
-            max_header_row = max([max(cell['row_nums']) for cell in header_cells])
+            max_header_row = max([max(cell.row_nums) for cell in header_cells])
         else:
             max_header_row = -1
 
-        table_array = np.empty([num_rows, num_columns], dtype="object")
-        if len(cells) > 0:
-            for cell in cells:
-                for row_num in cell['row_nums']:
-                    for column_num in cell['col_nums']:
-                        table_array[row_num, column_num] = cell["text"]
-
-        header = table_array[:max_header_row+1,:]
-        flattened_header = []
-        for col in header.transpose():
-            flattened_header.append(' | '.join(OrderedDict.fromkeys(col)))
-        df = pd.DataFrame(table_array[max_header_row+1:,:], index=None, columns=flattened_header)
+        # fill column lists directly instead of routing through an
+        # object-dtype ndarray; pandas assembles the lists into blocks in C
+        # and the intermediate array was pure pointer churn anyway.
+        # iteration order keeps the original last-write-wins semantics
+        columns = [[None] * num_rows for _ in range(num_columns)]
+        for cell in cells:
+            text = cell.text
+            for col_i in cell.col_nums:
+                column = columns[col_i]
+                for row_i in cell.row_nums:
+                    column[row_i] = text
+
+        data_start = max_header_row + 1
+        # dict.fromkeys dedupes order-preservingly on plain lists;
+        # pd.unique no longer accepts list input on newer pandas
+        flattened_header = [' | '.join(dict.fromkeys(column[:data_start])) for column in columns]
+        # construct from positional keys first: header names may repeat and
+        # would collapse in a dict keyed by name
+        df = pd.DataFrame({col_i: column[data_start:] for col_i, column in enumerate(columns)})
+        df.columns = flattened_header
 
         return df
 
@@ -99,8 +129,10 @@ class TableModel(BaseModel):
     @classmethod
     def from_tsr_cells(cls, cells):
 
+        # trusted internal data: model_construct skips pydantic validation,
+        # which dominates per-cell construction cost on big tables
         return cls(metadata=TableMetaDataModel(title='', description=''),
-                    cells=[TableCellModel(
+                    cells=[TableCellModel.model_construct(
                                 text=c['cell text'],
                                 row_nums=c['row_nums'],
                                 col_nums=c['column_nums'],
@@ -114,7 +146,7 @@ class TableModel(BaseModel):
         html_string = f"<root>{html_str}</root>"
 
         # Parse the HTML string
-        root = ET.fromstring(html_string)
+        root = _xml_parser.fromstring(html_string)
 
         table = root.find('.//table')
         title = table.attrib['title'] if 'title' in table.attrib.keys() else ''
@@ -128,13 +160,19 @@ class TableModel(BaseModel):
             if row.tag in ['tr', 'thead']:
                 for col_i, cell in enumerate(row):
                     attrib = cell.attrib
-                    row_nums = [row_i] if 'rowspan' not in attrib.keys() else list(range(row_i, ast.literal_eval(attrib['rowspan'])))
-                    col_nums = [col_i] if 'colspan' not in attrib.keys() else list(range(col_i, ast.literal_eval(attrib['colspan'])))
+                    # the span attributes are plain ints and bbox is a json
+                    # list; targeted parsers avoid ast.literal_eval's full
+                    # parser/AST walk per cell
+                    rowspan = int(attrib['rowspan']) if 'rowspan' in attrib else 1
+                    colspan = int(attrib['colspan']) if 'colspan' in attrib else 1
+                    row_nums = [row_i] if rowspan == 1 else list(range(row_i, row_i + rowspan))
+                    col_nums = [col_i] if colspan == 1 else list(range(col_i, col_i + colspan))
                     col_header = (cell.tag == 'th')
-                    bbox = ast.literal_eval(attrib['bbox']) if 'bbox' in attrib.keys() else [0,0,0,0]
+                    bbox = json.loads(attrib['bbox']) if 'bbox' in attrib else [0,0,0,0]
                     text = cell.text if cell.text else ''
 
-                    cell = TableCellModel(
+                    # values are produced by the parsers above, skip validation
+                    cell = TableCellModel.model_construct(
                         text=text,
                         row_nums=row_nums,
                         col_nums=col_nums,
@@ -4,7 +4,6 @@ from .iterative_json_completion import (
 )
 
 from meri.intermediate_format.format_handler import BasicFormatHandler
-import json
 
 def create_openai_tools_arr(func_name, func_desc, output_schema):
 
@@ -36,16 +35,19 @@ def check_not_found_params(results: dict, schema: dict) -> dict:
     # 获取实际提取的参数
     tech_specs_result = results.get('technicalSpecifications', {})
     
-    # 检查每个参数
+    # 检查每个参数。notFoundList 的成员检查走 set，避免 O(N²) 的列表扫描
+    not_found_list = results['notFoundList']
+    existing = set(not_found_list)
     for param_name in tech_specs_schema.keys():
         param_data = tech_specs_result.get(param_name, {})
         param_props = param_data.get('parameter_properties', {}) if param_data else {}
         value = param_props.get('value') if param_props else None
-        
+
         # 如果没有有效值且不在 notFoundList 中
         has_valid_value = value is not None and value != ""
-        if not has_valid_value and param_name not in results['notFoundList']:
-            results['notFoundList'].append(param_name)
+        if not has_valid_value and param_name not in existing:
+            not_found_list.append(param_name)
+            existing.add(param_name)
     
     return results
 
@@ -76,8 +78,8 @@ class JsonExtractor:
                                            temp=self.temp)
         results = populator.complete(content_chunks)
         
-        # 后处理：确保未找到的参数在 notFoundList 中
-        schema = json.loads(json_schema_string)
-        results = check_not_found_params(results, schema)
+        # 后处理：确保未找到的参数在 notFoundList 中。populator 在初始化时已
+        # 解析过 schema，直接复用，避免重复 json.loads 大字符串
+        results = check_not_found_params(results, populator.json_schema)
 
         return results
\ No newline at end of file
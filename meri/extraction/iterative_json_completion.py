@@ -58,14 +58,16 @@ class IterativeJsonPopulator:
 
     def __init__(self, json_schema_str: str, strategy: IterativePopulationStrategies, n_rounds=3, model = 'gpt-4o-mini', temp=0.3, api_key: str = None) -> None:
         self.json_schema_str = json_schema_str
+        # parse once here; the completion strategies and response format all
+        # reuse the same dict
+        self.json_schema = json.loads(json_schema_str)
         self.population_strategy = strategy
         self.model = model
         self.n_rounds = n_rounds
         self.temp = temp
 
     def get_response_format(self):
-        schema = json.loads(self.json_schema_str)
-        return create_openai_response_format(name="populate_json_schema", schema=schema)
+        return create_openai_response_format(name="populate_json_schema", schema=self.json_schema)
 
     def complete(self, content_chunks: List[List[Dict]]):
         strategy_method = {
@@ -132,7 +134,7 @@ class IterativeJsonPopulator:
 
     def selfsupervised_completion(self, content_chunks):
         populated_dict = {}
-        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', json.loads(self.json_schema_str))
+        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', self.json_schema)
 
         for i in range(self.n_rounds):
             print('Round: ', i)
@@ -142,7 +144,7 @@ class IterativeJsonPopulator:
 
     def one2one_completion(self, content_chunks):
         populated_json_dict = {}
-        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', json.loads(self.json_schema_str))
+        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', self.json_schema)
         for c_chunk in tqdm.tqdm(content_chunks, total=len(content_chunks), desc='Processing content chunks'):
             for msg in c_chunk:
                 populated_json_dict = self.process_completion([msg], populated_json_dict, tools)
@@ -150,7 +152,7 @@ class IterativeJsonPopulator:
 
     def one2many_completion(self, content_chunks):
         populated_json_dict = {}
-        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', json.loads(self.json_schema_str))
+        tools = create_openai_tools_arr('populate_json_schema', 'populate a json schema', self.json_schema)
         for c_chunk in tqdm.tqdm(content_chunks, total=len(content_chunks), desc='Processing content chunks'):
             for msg in c_chunk:
                 populated_json_dict = self.process_completion([msg], populated_json_dict, tools)
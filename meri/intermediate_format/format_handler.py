@@ -3,6 +3,14 @@ from typing import List, Tuple, Dict
 import re
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+# the root className and the img src are single-token lookups; a compiled
+# regex avoids a full XML parse per part. className sits on the root tag,
+# so a bounded search window is enough.
+_CLASS_RE = re.compile(r'className="([^"]*)"')
+_IMG_SRC_RE = re.compile(r'<img[^>]*\ssrc="([^"]*)"')
+
 
 class BasicFormatHandler(ABC):
 
@@ -26,11 +34,23 @@ class HTMLFormatHandler(BasicFormatHandler):
     
     def __init__(self, html_str: str = '', seperator="\n\n") -> None:
         self.seperator = seperator
-        self.html_str = html_str
+        self._fragments = [html_str]
+        self._html_str_cache = html_str
 
     def add(self, x: str | List[str]):
-        to_be_joined = [self.html_str, x] if isinstance(x, str) else [self.html_str] + x
-        self.html_str = self.seperator.join(to_be_joined)
+        # O(1) amortized: collect fragments and join lazily instead of
+        # re-copying the whole accumulated string on every add
+        if isinstance(x, str):
+            self._fragments.append(x)
+        else:
+            self._fragments.extend(x)
+        self._html_str_cache = None
+
+    @property
+    def html_str(self) -> str:
+        if self._html_str_cache is None:
+            self._html_str_cache = self.seperator.join(self._fragments)
+        return self._html_str_cache
 
     @classmethod
     def find_first_base64_substring(cls, xml_string):
@@ -52,26 +72,27 @@ class HTMLFormatHandler(BasicFormatHandler):
 
         return self.html_str.split('\n\n')
 
-    def split_add_type(self) -> List[Tuple[str, str]]:
-        """splits html str based on seperator and returns components as tuples (<type>, <html_string>) where
-        type can be text or image.
+    def split_add_type(self) -> List[Tuple[str, str, str]]:
+        """splits html str based on seperator and returns components as tuples (<type>, <html_string>, <img_src>) where
+        type can be text or image. For image parts <img_src> carries the base64 src extracted
+        during the same parse (None for text parts), so consumers never re-parse the snippet.
 
         Returns:
-            List[Tuple[str, str]]: _description_
+            List[Tuple[str, str, str]]: _description_
         """
-        parts = self.split()
-        types = []
-        for html_part in parts:
-            xml_tree = ET.ElementTree(ET.fromstring(html_part))
-            
-            if  xml_tree.getroot().attrib["className"] == 'image_wrapper':
-                t = 'image'
+        typed_parts = []
+        for html_part in self.split():
+            m = _CLASS_RE.search(html_part, 0, 256)
+
+            if m and m.group(1) == 'image_wrapper':
+                src_m = _IMG_SRC_RE.search(html_part)
+                if src_m is None or not src_m.group(1):
+                    raise TypeError('Didnt find base64 in html tree of image')
+                typed_parts.append(('image', html_part, src_m.group(1)))
             else:
-                t = 'text'
-
-            types.append(t)
+                typed_parts.append(('text', html_part, None))
 
-        return list(zip(types, parts))
+        return typed_parts
     
     def chunk(self, character_threshold=1000, overlap=2) -> List[List[Tuple[str, str]]]:
         """Chunks html into smaller overlapping bits
@@ -86,36 +107,39 @@ class HTMLFormatHandler(BasicFormatHandler):
             _type_: _description_
         """
         print('computing with character threshold: ', character_threshold)
-        html_parts = self.split_add_type()
+        # precompute each part's character weight once; images count a flat
+        # 4000 characters (approx. 500 token per image times avg. 4 characters per token)
+        parts = self.split_add_type()
+        weights = np.fromiter((4000 if t == 'image' else len(cont) for t, cont, _ in parts),
+                              dtype=np.int64, count=len(parts))
+        cum = np.cumsum(weights)
+
+        # a chunk ends at the first part whose cumulative weight (counted
+        # from the previous boundary) reaches the threshold; one binary
+        # search per chunk on the global cumsum replaces the per-part
+        # python accumulation loop
         chunks = []
-        current_chunk = []
-        character_counter = 0
-        
-        for i, (type, cont) in enumerate(html_parts):
-            if type == 'text':
-                current_chunk.append((type, cont))
-                character_counter += len(cont)
-            elif type == 'image':
-                character_counter += 4000 # approx.500 token per image times avg. 4 characters per token
-                current_chunk.append((type, cont))
-            else:
-                current_chunk.append((type, cont))
-            
-            # chunk complete if character threshold reached OR no more html parts left
-            if character_counter >= character_threshold or i == len(html_parts)-1:
-                chunks.append(current_chunk)
+        carry = []
+        prev = -1
+        last = len(parts) - 1
+
+        while prev < last:
+            target = (cum[prev] if prev >= 0 else 0) + character_threshold
+            boundary = min(int(np.searchsorted(cum, target, side='left')), last)
+            chunk = carry + parts[prev + 1:boundary + 1]
+            chunks.append(chunk)
 
-                # always add previous html part as overlap
-                current_chunk = [*current_chunk[-overlap:]] if len(current_chunk)>0 and overlap>0 else []
-                character_counter = 0
+            # always add previous html part as overlap
+            carry = chunk[-overlap:] if overlap > 0 else []
+            prev = boundary
 
         return chunks
     
-    def prepare_gpt_message_content(self, chunk: List[Tuple[str, str]]):
+    def prepare_gpt_message_content(self, chunk: List[Tuple[str, str, str]]):
         """_summary_
 
         Args:
-            chunk (List[Tuple[str, str]]): List of tuple (<type>, <html_string>) where <type> is text or image
+            chunk (List[Tuple[str, str, str]]): List of tuple (<type>, <html_string>, <img_src>) where <type> is text or image
             image_detail (str, optional): Determines image processing in gpt. Defaults to 'high'.
 
         Raises:
@@ -127,16 +151,23 @@ class HTMLFormatHandler(BasicFormatHandler):
         """
         message_contents = []
 
-        for (type, cont) in chunk:
+        for (type, cont, src) in chunk:
             if type == 'text':
+                # buffer consecutive text parts and join once at the end
+                # instead of re-copying the growing string per part
                 if len(message_contents)==0 or message_contents[-1]['type'] != "text":
-                    message_contents.append({"type": "text", "text": ''})
-                message_contents[-1]["text"] = self.seperator.join([message_contents[-1]["text"], cont])
+                    message_contents.append({"type": "text", "parts": ['']})
+                message_contents[-1]["parts"].append(cont)
             elif type == 'image':
-                message_contents.append({"type": "image_url", "image_url": {"url": self.find_first_base64_substring(cont)}})
+                # src was extracted when the part was first parsed in split_add_type
+                message_contents.append({"type": "image_url", "image_url": {"url": src}})
             else:
                 raise NotImplementedError
-        
+
+        for content in message_contents:
+            if content['type'] == 'text':
+                content["text"] = self.seperator.join(content.pop("parts"))
+
         return message_contents
 
     def save(self, path):
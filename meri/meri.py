@@ -1,22 +1,20 @@
-from docling.document_converter import DocumentConverter
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.pipeline_options import PdfPipelineOptions, TableStructureOptions, TableFormerMode
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.document import *
-from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
-
-# 导入EasyOcrOptions用于配置OCR语言
-try:
-    from docling.datamodel.pipeline_options import EasyOcrOptions
-except ImportError:
-    EasyOcrOptions = None
+import hashlib
+import json
+from pathlib import Path
 
 from .intermediate_format.format_handler import HTMLFormatHandler
 
-from .utils.docling_utils import export_to_html, vis_layout
 from .extraction.extractor import JsonExtractor
 from .utils.html_post_processor import enhance_html_for_extraction
 
+# docling（连带 torch/transformers）在 MERI.__init__ 中延迟导入，
+# 只用 JsonExtractor/TableModel 时 import meri 不再付启动开销
+
+# 中间格式缓存目录与版本号。docling 转换/HTML 导出逻辑变更时递增版本号，
+# 使旧缓存自动失效
+_INTERMEDIATE_CACHE_DIR = Path.home() / '.cache' / 'meri'
+_INTERMEDIATE_CACHE_VERSION = 'v1'
+
 class MERI:
 
     def __init__(self, pdf_path, chunks_max_characters=450000, model='gpt-4o-mini', model_temp=0.0,
@@ -32,6 +30,18 @@ class MERI:
 
         self.format_handler = None
 
+        # 延迟导入docling，避免仅导入meri包时就加载torch等重依赖
+        from docling.document_converter import DocumentConverter, PdfFormatOption
+        from docling.datamodel.pipeline_options import PdfPipelineOptions, TableStructureOptions, TableFormerMode
+        from docling.datamodel.base_models import InputFormat
+        from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+
+        # 导入EasyOcrOptions用于配置OCR语言
+        try:
+            from docling.datamodel.pipeline_options import EasyOcrOptions
+        except ImportError:
+            EasyOcrOptions = None
+
         table_structure_options = TableStructureOptions(mode=TableFormerMode.ACCURATE,
                                                         do_cell_matching=do_cell_matching)
 
@@ -67,27 +77,53 @@ class MERI:
                     }
             )   
 
+    def _intermediate_cache_path(self):
+        # 以 PDF 字节的 SHA256 为键（现代 CPU 上有 SHA-NI，哈希开销可忽略），
+        # 并把版本号和布局增强开关编入 key，避免不同配置互相污染
+        digest = hashlib.sha256(Path(self.pdf_path).read_bytes()).hexdigest()
+        return _INTERMEDIATE_CACHE_DIR / f"{digest}-{_INTERMEDIATE_CACHE_VERSION}-enh{int(self.enhance_layout)}.html"
+
     def to_intermediate(self):
+        # 同一份 PDF 重复处理（如参数扫描）时直接读磁盘缓存，
+        # 跳过整个 docling 转换流水线。注意：缓存命中时不会生成
+        # self.docling_result，vis_layout 仅在完整转换后可用
+        cache_path = self._intermediate_cache_path()
+        if cache_path.is_file():
+            print(f"命中中间格式缓存: {cache_path}")
+            self.int_format = cache_path.read_text(encoding='utf-8')
+            self.format_handler = HTMLFormatHandler(self.int_format)
+            return
+
+        # docling_utils 顶层引用 docling 的数据模型，同样延迟导入
+        from .utils.docling_utils import export_to_html
+
         self.docling_result = self.converter.convert(self.pdf_path)
 
         self.int_format = export_to_html(self.docling_result.document)
-        
+
         # 如果启用布局增强，智能合并分离的键值对
         if self.enhance_layout:
             print("正在进行布局增强（合并分离的键值对）...")
             self.int_format = enhance_html_for_extraction(self.int_format)
             print("布局增强完成")
-        
+
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(self.int_format, encoding='utf-8')
         self.format_handler = HTMLFormatHandler(self.int_format)
 
     def vis_layout(self, **kwargs):
+        from .utils.docling_utils import vis_layout
 
         return vis_layout(self.docling_result, **kwargs)
     
-    def run(self, json_schema_str: str):
+    def run(self, json_schema: str | dict):
         if not self.format_handler:
             self.to_intermediate()
-        
+
+        # accept an already parsed schema dict to avoid callers roundtripping
+        # through json.dumps/json.loads
+        json_schema_str = json_schema if isinstance(json_schema, str) else json.dumps(json_schema, ensure_ascii=False)
+
         self.jsonExtractor = JsonExtractor(intermediate_format=self.format_handler,
                                             chunks_max_characters=self.chunks_max_characters, 
                                             model=self.model, 
@@ -95,3 +131,4 @@ class MERI:
                                             n_rounds=self.n_rounds)
                 
         return self.jsonExtractor.populate_schema(json_schema_string=json_schema_str)
+
@@ -1,15 +1,26 @@
 from docling.datamodel.document import *
-from docling_core.types.doc import GroupItem, ProvenanceItem, BoundingBox
+from docling_core.types.doc import CoordOrigin, GroupItem, ProvenanceItem, BoundingBox
 from docling_core.types.doc.document import DEFAULT_EXPORT_LABELS, GroupLabel
-import xml.etree.ElementTree as ET
+import html as _html
 import os
+import numpy as np
 import pymupdf
 from PIL import Image, ImageDraw, ImageFont
 
 from ..datamodels.datamodels import *
-from .utils import scale_coords, pdf_to_im
+from .utils import pdf_to_im
 
-def vis_layout(docling_conversion_result, ignrore_labels=[], save=False, save_path=None):
+# loaded once; constructing the default font per drawn element is pure waste
+_DEFAULT_FONT = ImageFont.load_default()
+
+# the per-item "exactly one prov" assertions run len() on a pydantic list
+# for every element; they only fire on malformed docling output, so they
+# are opt-in via MERI_DEBUG. item.prov[0] raises IndexError on the empty
+# case either way
+_VALIDATE_PROV = bool(os.environ.get('MERI_DEBUG'))
+
+def vis_layout(docling_conversion_result, ignrore_labels=[], save=False, save_path=None, pages=None, dpi=100,
+               return_images=True):
     element_colors = {
         "caption": (255, 165, 0),            # Orange
         "footnote": (0, 128, 0),             # Green
@@ -33,41 +44,94 @@ def vis_layout(docling_conversion_result, ignrore_labels=[], save=False, save_pa
     }
     fitz_doc = pymupdf.open(docling_conversion_result.input.file)
 
-    page_elements = {i: [] for i in range(len(fitz_doc))}
+    # parallel (labels, colors, bboxes) arrays per page instead of a list of
+    # tuples: the scale step can fancy-index the bbox array directly and the
+    # draw loop walks aligned arrays without unpacking
+    page_elements = {i: ([], [], []) for i in range(len(fitz_doc))}
+    page_heights = _page_heights(docling_conversion_result.document)
 
     for item, level in docling_conversion_result.document.iterate_items():
-        assert len(item.prov)==1
+        if _VALIDATE_PROV and len(item.prov) != 1:
+            raise ValueError(f'expected exactly one prov, got {len(item.prov)}')
         prov = item.prov[0]
 
         if item.label.value not in ignrore_labels:
-            page_elements[prov.page_no-1].append((item.label, docling_bbox_to_topleft(
-                docling_conversion_result.document,
-                prov.page_no,
-                prov.bbox
-            ).as_tuple()))
+            # resolve label text and color once here so the draw loop is a
+            # straight rectangle + text call per element
+            labels, colors, bboxes = page_elements[prov.page_no-1]
+            labels.append(item.label.value)
+            colors.append(element_colors[item.label.value])
+            bboxes.append(_to_topleft(prov.bbox, page_heights[prov.page_no]))
 
     pil_images = []
-    for i, page in enumerate(fitz_doc):
+    # the MuPDF page render dominates the cost of this function, so when the
+    # caller only needs a subset of pages the others are never rasterized
+    page_indices = range(len(fitz_doc)) if pages is None else sorted(set(pages))
+    for i in page_indices:
+        page = fitz_doc[i]
         pdf_width, pdf_height = page.rect[2:]
-        im = pdf_to_im(page)
-        im_height, im_width = np.asarray(im).shape[:2]
-        draw = ImageDraw.Draw(im)
-        
-        for (label, bbox) in page_elements[i]:
-            draw.rectangle(scale_coords(bbox, pdf_height, pdf_width, im_height, im_width), 
-                            outline=element_colors[label.value])
-            
-            # Calculate the position for the text
-            # You can adjust the offset as needed
-            text_position = (bbox[0], bbox[1] - 10)  # Place text above the bounding box
-
-            # Load a font (optional, you can specify a font file)
-            font = ImageFont.load_default()  # Use default font or load a specific font
-
-            # Draw the text
-            draw.text(text_position, label.value, fill=element_colors[label.value], font=font)
-        
-        pil_images.append(im)
+        # ~100 dpi is plenty for a debug overlay; render time and buffer
+        # size grow quadratically with dpi
+        im = pdf_to_im(page, dpi=dpi)
+        # zero-copy metadata access; converting to an array just for the
+        # shape would copy the whole page buffer even on pages with
+        # nothing to draw
+        im_width, im_height = im.size
+
+        # scale factors are constant per page; one numpy broadcast scales
+        # every bbox on the page instead of four python multiplies each
+        sx = im_width / pdf_width
+        sy = im_height / pdf_height
+
+        # sort by label so all rectangles of one color are issued
+        # consecutively (z-order between overlapping outlines is irrelevant
+        # for a debug overlay)
+        labels, colors, bboxes = page_elements[i]
+        order = sorted(range(len(labels)), key=labels.__getitem__)
+        if order:
+            scaled = (np.asarray(bboxes, dtype=np.float64)[order]
+                      * np.array([sx, sy, sx, sy])).astype(np.int64).tolist()
+
+            # paint the 1px outlines as four row/column slice stores per box
+            # (a C-level memset each) instead of per-box PIL draw calls;
+            # edges are clipped to the page like draw.rectangle does
+            arr = np.asarray(im).copy()
+            for k, rect in zip(order, scaled):
+                x0, y0, x1, y1 = rect
+                if x1 < x0:
+                    x0, x1 = x1, x0
+                if y1 < y0:
+                    y0, y1 = y1, y0
+                x0c, x1c = max(x0, 0), min(x1, im_width - 1)
+                y0c, y1c = max(y0, 0), min(y1, im_height - 1)
+                if x0c > x1c or y0c > y1c:
+                    continue
+                color = colors[k]
+                if 0 <= y0:
+                    arr[y0, x0c:x1c + 1] = color
+                if y1 < im_height:
+                    arr[y1, x0c:x1c + 1] = color
+                if 0 <= x0:
+                    arr[y0c:y1c + 1, x0] = color
+                if x1 < im_width:
+                    arr[y0c:y1c + 1, x1] = color
+            im = Image.fromarray(arr)
+
+            # text still goes through PIL with the module-level font; getmask
+            # cores cannot be stamped via ImageDraw.bitmap, which expects a
+            # full Image
+            draw = ImageDraw.Draw(im)
+            for k, rect in zip(order, scaled):
+                label_value = labels[k]
+                color = colors[k]
+
+                # Calculate the position for the text
+                # You can adjust the offset as needed
+                # Place text above the bounding box, in scaled image coordinates
+                text_position = (rect[0], rect[1] - 10)
+
+                # Draw the text
+                draw.text(text_position, label_value, fill=color, font=_DEFAULT_FONT)
 
         if save:
             if save_path is None:
@@ -80,23 +144,39 @@ def vis_layout(docling_conversion_result, ignrore_labels=[], save=False, save_pa
             #plt.savefig(image_file_path, bbox_inches='tight', pad_inches=0)
             #plt.close()  # Close the figure to free memory
 
+        if return_images:
+            pil_images.append(im)
+        else:
+            # save-to-disk only: drop each page buffer immediately so peak
+            # memory stays at one page instead of O(pages)
+            im.close()
+
+    # release MuPDF's per-document caches
+    fitz_doc.close()
     return pil_images
 
 def docling_table_converter(item: TableItem, document):
     
-    assert len(item.prov) == 1
+    if _VALIDATE_PROV and len(item.prov) != 1:
+        raise ValueError(f'expected exactly one prov, got {len(item.prov)}')
     table_prov = item.prov[0]
     page_no = item.prov[0]
+    # all cells live on the table's page; resolve its height once
+    page_height = document.pages[table_prov.page_no].size.height
     cells = []
     for cell in item.data.table_cells:
 
         # convert to topleft coordiante system
-        bbox = list(docling_bbox_to_topleft(document, table_prov.page_no, cell.bbox).as_tuple()) if cell.bbox else [0,0,0,0]
+        bbox = list(_to_topleft(cell.bbox, page_height)) if cell.bbox else [0,0,0,0]
+        # most cells span a single row/column; a one-element literal skips
+        # the range object + list() materialization per cell
+        row_start, row_end = cell.start_row_offset_idx, cell.end_row_offset_idx
+        col_start, col_end = cell.start_col_offset_idx, cell.end_col_offset_idx
         cells.append(
             TableCellModel(
                 text = cell.text,
-                row_nums = list(range(cell.start_row_offset_idx, cell.end_row_offset_idx)),
-                col_nums = list(range(cell.start_col_offset_idx, cell.end_col_offset_idx)),
+                row_nums = [row_start] if row_end - row_start == 1 else list(range(row_start, row_end)),
+                col_nums = [col_start] if col_end - col_start == 1 else list(range(col_start, col_end)),
                 col_header = cell.column_header,
                 bbox = bbox
             )
@@ -105,9 +185,10 @@ def docling_table_converter(item: TableItem, document):
     return TableModel(metadata=TableMetaDataModel(title ="", description=""), cells = cells)
 
 def html_element(tag, className, attrs, content = None):
-    import html as html_module
-    attrs_str = ' '.join(f'{key}="{value}"' for key, value in attrs.items())
-    
+    # list comprehension instead of a generator: join materializes the
+    # sequence anyway and skips the generator frame for 2-3 attrs
+    attrs_str = ' '.join([f'{key}="{value}"' for key, value in attrs.items()])
+
     # for img src must be a property
     if tag == "img":
         assert "src" in attrs.keys()
@@ -116,7 +197,7 @@ def html_element(tag, className, attrs, content = None):
 
     else:
         if content:
-            content=html_module.escape(content)
+            content = _html.escape(content)
         return f'<{tag} className="{className}" {attrs_str}>{content}</{tag}>'
 
 
@@ -124,115 +205,159 @@ def docling_bbox_to_topleft(document, page_no, bbox: BoundingBox):
     return bbox.to_top_left_origin(document.pages[page_no].size.height)
 
 
-def prov_to_attr_dict(prov: ProvenanceItem, document):
+def _page_heights(document) -> dict:
+    # one pydantic traversal per page instead of one per element
+    return {page_no: page.size.height for page_no, page in document.pages.items()}
+
+
+def _to_topleft(bbox: BoundingBox, page_height) -> tuple:
+    # plain-tuple equivalent of BoundingBox.to_top_left_origin without
+    # allocating a new BoundingBox per element
+    if bbox.coord_origin == CoordOrigin.BOTTOMLEFT:
+        return (bbox.l, page_height - bbox.t, bbox.r, page_height - bbox.b)
+    return (bbox.l, bbox.t, bbox.r, bbox.b)
+
+
+def prov_to_attr_dict(prov: ProvenanceItem, page_heights: dict):
     # convert to topleft coord syste,
+    # bbox is pre-rendered to its attribute string (identical to what
+    # f-string interpolation of the list produced) so it is formatted once
     attrs = {
-            "bbox": list(docling_bbox_to_topleft(document, prov.page_no, prov.bbox).as_tuple()), #.to_top_left_origin(result.document.pages[prov.page_no].size.height),
+            "bbox": str(list(_to_topleft(prov.bbox, page_heights[prov.page_no]))),
             "page_index": prov.page_no - 1 # page index starts at 0
         }
-    
+
     return attrs
 
 
-def export_to_html(document: DoclingDocument, labels: set[DocItemLabel] = DEFAULT_EXPORT_LABELS, strict_text : bool = False) -> str:
-    """Serialize to HTML.
+# simple TextItem renderings keyed on label: one dict lookup replaces the
+# sequential isinstance/label ladder per item. Section headers need the
+# nesting level, so every handler takes (item, level, attrs)
+_LIST_GROUPS = frozenset({GroupLabel.LIST, GroupLabel.ORDERED_LIST})
 
-    Converts the document's main text to HTML format.
+_TEXT_HANDLERS = {
+    DocItemLabel.TITLE: lambda item, level, attrs: html_element("h1", "title_wrapper", attrs, item.text),
+    DocItemLabel.SECTION_HEADER: lambda item, level, attrs: html_element(f"h{level + 1}", "section_wrapper", attrs, item.text),
+    DocItemLabel.PARAGRAPH: lambda item, level, attrs: html_element("p", "paragraph_wrapper", attrs, item.text),
+    DocItemLabel.CODE: lambda item, level, attrs: html_element("code", "code_wrapper", attrs, item.text),
+}
+
+
+def _classify_items(document: DoclingDocument, labels: set[DocItemLabel] = DEFAULT_EXPORT_LABELS, strict_text: bool = False):
+    """Single traversal of the document body yielding pre-classified events
+    (kind, payload, level, attrs).
+
+    Kinds: 'list_open' (payload is the ul/ol tag), 'list_close',
+    'list_item'/'table'/'picture' (payload is the item) and 'text'
+    (payload is the already rendered element string). Downstream writers
+    consume the event stream as a flat state machine, and additional
+    consumers (e.g. a JSON export) can share the same classified walk
+    without re-traversing the document.
     """
-    html_parts = []
+    page_heights = _page_heights(document)
+    in_list = False
 
-    # Currently doesnt support nested lists
-    list_element: ET.Element = None
-
-    for ix, (item, level) in enumerate(document.iterate_items(document.body, with_groups=True)):
-
-        
-        
-        if isinstance(item, GroupItem) and item.label in [
-                GroupLabel.LIST,
-                GroupLabel.ORDERED_LIST,
-            ]:
-            attrs = {"className": "list_wrapper"}
-            if item.label == GroupLabel.LIST:
-                element = "ul"
-                
-            elif item.label == GroupLabel.ORDERED_LIST:
-                element = "ol"
-
-            list_element = ET.Element(element, attrib=attrs)
-            
+    for item, level in document.iterate_items(document.body, with_groups=True):
+
+        if isinstance(item, GroupItem) and item.label in _LIST_GROUPS:
+            # enum members are singletons, so identity compares suffice
+            yield ('list_open', 'ul' if item.label is GroupLabel.LIST else 'ol', level, None)
+            in_list = True
             continue
-        
-        # if we have list_element from prev items and current one is not list item
-        # close list element and add to html parts. Reset list_element to None
-        elif item.label not in [DocItemLabel.LIST_ITEM] and list_element is not None:
-            html_list = ET.tostring(list_element, encoding='unicode', method='html')
-            html_parts.append(html_list)
-            list_element = None
-        
+
+        # if we have a list from prev items and current one is not list item
+        # close the list
+        elif item.label is not DocItemLabel.LIST_ITEM and in_list:
+            yield ('list_close', None, level, None)
+            in_list = False
+
         elif isinstance(item, GroupItem):
             continue
 
         # TODO what to do if more item.provs?
-        assert len(item.prov) == 1
-        attrs = prov_to_attr_dict(item.prov[0], document)
+        if _VALIDATE_PROV and len(item.prov) != 1:
+            raise ValueError(f'expected exactly one prov, got {len(item.prov)}')
+        attrs = prov_to_attr_dict(item.prov[0], page_heights)
 
-        if isinstance(item, TextItem) and item.label in [DocItemLabel.TITLE]:
-            html_parts.append(html_element("h1", "title_wrapper", attrs, item.text))
+        if isinstance(item, ListItem) and item.label is DocItemLabel.LIST_ITEM:
+            yield ('list_item', item, level, attrs)
 
-        elif isinstance(item, TextItem) and item.label in [DocItemLabel.SECTION_HEADER]:
-            html_parts.append(html_element(f"h{level + 1}", "section_wrapper", attrs, item.text))
+        elif isinstance(item, TextItem):
+            handler = _TEXT_HANDLERS.get(item.label)
+            if handler is not None:
+                yield ('text', handler(item, level, attrs), level, attrs)
+            # captions are printed in picture and table ... skipping for now
+            # See docling implementation
+            elif item.label is not DocItemLabel.CAPTION and item.label in labels:
+                yield ('text', html_element(f"div", "text_wrapper", attrs, item.text), level, attrs)
 
-        elif isinstance(item, TextItem) and item.label in [DocItemLabel.PARAGRAPH]:
-            html_parts.append(html_element(f"p", "paragraph_wrapper", attrs, item.text))
+        elif isinstance(item, TableItem):
+            yield ('table', item, level, attrs)
 
-        elif isinstance(item, TextItem) and item.label in [DocItemLabel.CODE]:
-            html_parts.append(html_element(f"code", "code_wrapper", attrs, item.text))
+        elif isinstance(item, PictureItem) and not strict_text:
+            yield ('picture', item, level, attrs)
 
-        elif isinstance(item, TextItem) and item.label in [DocItemLabel.CAPTION]:
-            # captions are printed in picture and table ... skipping for now
-            # See docling implementation
-            continue
+    if in_list:
+        yield ('list_close', None, 0, None)
 
-        elif isinstance(item, ListItem) and item.label in [DocItemLabel.LIST_ITEM]:
-            attrs["className"] = "listitem_wrapper"
-            attrs = {key: str(value) for key, value in attrs.items()}
-            
-            li = ET.SubElement(list_element, "li", attrib=attrs) # TODO add attrs
-            li.text = item.text
 
-            
-        elif isinstance(item, TextItem) and item.label in labels:
-            html_parts.append(html_element(f"div", "text_wrapper", attrs, item.text))
+def export_to_html(document: DoclingDocument, labels: set[DocItemLabel] = DEFAULT_EXPORT_LABELS, strict_text : bool = False) -> str:
+    """Serialize to HTML.
 
-            
-        elif isinstance(item, TableItem):
+    Converts the document's main text to HTML format.
+    """
+    html_parts = []
+
+    # Currently doesnt support nested lists. Lists are plain string
+    # fragments joined on close; no XML features are used, so the
+    # ElementTree node graph and tostring pass were pure overhead
+    list_tag = None  # "ul" or "ol" while inside a list group
+    list_items = []
+
+    for kind, payload, level, attrs in _classify_items(document, labels, strict_text):
+
+        if kind == 'text':
+            # payload is already the rendered element string
+            html_parts.append(payload)
+
+        elif kind == 'list_item':
+            # quote=False matches ElementTree's text escaping (&, <, >)
+            list_items.append(f'<li bbox="{attrs["bbox"]}" page_index="{attrs["page_index"]}" '
+                              f'className="listitem_wrapper">{_html.escape(payload.text, quote=False)}</li>')
+
+        elif kind == 'list_open':
+            list_tag = payload
+            list_items = []
+
+        elif kind == 'list_close':
+            html_parts.append(f'<{list_tag} className="list_wrapper">{"".join(list_items)}</{list_tag}>')
+            list_tag = None
+
+        elif kind == 'table':
             # convert table to our format
-            table: TableModel = docling_table_converter(item, document)
+            table: TableModel = docling_table_converter(payload, document)
             html_parts.append(html_element(f"div", "table_wrapper", attrs, table.to_html(add_bbox_as_attr=True)))
 
-            # add caption as text if present
-            if not len(item.caption_text(document)) == 0:
-                html_parts.append(html_element(f"div", "caption_wrapper", {}, item.caption_text(document)))
+            # add caption as text if present; caption_text walks the caption
+            # refs, so resolve it once
+            caption = payload.caption_text(document)
+            if caption:
+                html_parts.append(html_element(f"div", "caption_wrapper", {}, caption))
 
-            
-        elif isinstance(item, PictureItem) and not strict_text:
+        elif kind == 'picture':
             # 跳过没有有效图片数据的元素（如形状、签名等）
-            if item.image is None or item.image.uri is None:
+            if payload.image is None or payload.image.uri is None:
                 continue
-            
+
             # add image
-            img_element = html_element(f"img", "", {"src": item.image.uri})
+            img_element = html_element(f"img", "", {"src": payload.image.uri})
             html_parts.append(html_element("div", "image_wrapper", attrs, content=img_element))
 
             # add caption as text if present
-            if not len(item.caption_text(document)) == 0:
-                html_parts.append(html_element(f"div", "caption_wrapper", {}, item.caption_text(document)))
-
-            # Add more item types as needed...
-    if list_element is not None:
-        html_list = ET.tostring(list_element, encoding='unicode', method='html')
-        html_parts.append(html_list)
-        list_element = None
+            caption = payload.caption_text(document)
+            if caption:
+                html_parts.append(html_element(f"div", "caption_wrapper", {}, caption))
+
+        # Add more event kinds as needed...
     # Join all parts into a single HTML string
     return "\n\n".join(html_parts)
\ No newline at end of file
@@ -2,25 +2,97 @@
 HTML后处理工具
 用于处理PDF转HTML后的布局问题，特别是左右分离的键值对
 """
+import bisect
 import re
 import xml.etree.ElementTree as ET
+from functools import lru_cache
 from typing import List, Tuple, Dict
 import html as html_module
 
+# fragment parsing dominates this module's runtime; lxml parses via
+# libxml2 and is several times faster on these small fragments, with the
+# stdlib parser as fallback when it is not installed
+try:
+    from lxml import etree as _xml_parser
+except ImportError:
+    _xml_parser = ET
 
+# 单元素片段只需要标签、bbox、page_index和正文四个字段，完整XML解析的
+# 实体解码和树构建在这里都是浪费。html_element 固定 bbox 写在
+# page_index 之前，所以一个正则就够了；不匹配时回退到XML解析
+_ATTR_RE = re.compile(r'<(\w+)[^>]*\sbbox="([^"]+)"[^>]*\spage_index="([^"]+)"[^>]*>([^<]*)')
+
+# <ul>快路径：导出的<li>没有嵌套标签，正则直接切出原始片段，省掉
+# 每个<li>一次树遍历加序列化；形状异常时回退到XML解析
+_LI_RE = re.compile(r'<li\s[^>]*>[^<]*</li>')
+
+
+def _split_li_fragments(part: str):
+    """把<ul>片段按正则切成 (原始<li>片段, bbox, page_index, 正文) 列表
+
+    <li>数量和正则匹配数对不上、或属性顺序与快路径假设不符时返回None，
+    由调用方回退到完整XML解析。没有位置属性的<li>返回 (片段, None,
+    None, 正文)。
+    """
+    fragments = _LI_RE.findall(part)
+    if len(fragments) != part.count('<li'):
+        return None
+
+    result = []
+    for li_html in fragments:
+        m = _ATTR_RE.match(li_html)
+        if m is not None:
+            result.append((li_html, m.group(2), m.group(3),
+                           html_module.unescape(m.group(4))))
+        elif 'bbox="' in li_html and 'page_index="' in li_html:
+            # 属性存在但顺序异常，交给XML解析处理
+            return None
+        else:
+            text = li_html[li_html.index('>') + 1:-len('</li>')]
+            result.append((li_html, None, None, html_module.unescape(text)))
+    return result
+
+
+def _parse_all_parts(parts: List[str]) -> List[Tuple[str, object]]:
+    """用一次解析器调用解析所有片段
+
+    把片段包在一个合成的<root>里整体解析一次，再把得到的子元素与原始
+    字符串对齐，调用方因此保留原始字节。返回(part, element)对的列表，
+    element为None表示该片段解析失败；整体解析失败或数量对不上（如某个
+    片段格式错误）时回退到逐片段解析。
+    """
+    try:
+        root = _xml_parser.fromstring('<root>' + '\n\n'.join(parts) + '</root>')
+    except Exception:
+        root = None
+
+    if root is not None and len(root) == len(parts):
+        return list(zip(parts, root))
+
+    pairs = []
+    for part in parts:
+        try:
+            pairs.append((part, _xml_parser.fromstring(part)))
+        except Exception:
+            pairs.append((part, None))
+    return pairs
+
+
+@lru_cache(maxsize=65536)
 def extract_bbox(bbox_str: str) -> Tuple[float, float, float, float]:
     """从bbox字符串提取坐标
-    
+
+    同一个元素的bbox字符串会被排序和多轮合并反复解析，结果按
+    字符串缓存，重复出现时免掉strip/split/float。
+
     Args:
         bbox_str: 格式如 "[113.09, 263.28, 181.42, 276.89]"
-    
+
     Returns:
         (x1, y1, x2, y2) 坐标元组
     """
     try:
-        bbox_str = bbox_str.strip('[]')
-        coords = [float(x.strip()) for x in bbox_str.split(',')]
-        return tuple(coords)
+        return tuple(float(x) for x in bbox_str.strip('[]').split(','))
     except:
         return (0, 0, 0, 0)
 
@@ -84,49 +156,62 @@ def sort_html_by_position(html_str: str, y_group_threshold: float = 5.0) -> str:
     Returns:
         排序后的HTML字符串
     """
-    parts = html_str.split('\n\n')
-    
-    # 解析每个部分，提取位置信息
-    elements_by_page = {}  # {page_index: [elements]}
+    parts = [p for p in html_str.split('\n\n') if p.strip()]
+
+    # 解析每个部分，提取位置信息。排序只需要y、x和原始HTML三个字段，
+    # 用元组 (y, x, html) 代替每元素一个dict，省掉哈希表开销
+    elements_by_page = {}  # {page_index: [(y, x, html)]}
     elements_without_pos = []  # 没有位置信息的元素
-    
-    for part in parts:
-        if not part.strip():
+
+    for part, root in _parse_all_parts(parts):
+        if root is None:
+            # 解析失败的元素
+            elements_without_pos.append(part)
             continue
-        
+
         try:
             # 检查是否是<ul>容器
             if '<ul className="list_wrapper">' in part and '</ul>' in part:
-                # 拆散<ul>，提取每个<li>作为独立元素
-                root = ET.fromstring(part)
+                # 拆散<ul>，提取每个<li>作为独立元素。快路径直接用正则
+                # 切出原始片段，跳过逐个<li>的序列化
+                li_parts = _split_li_fragments(part)
+                if li_parts is not None:
+                    for li_html, bbox_str, page_index, _ in li_parts:
+                        if bbox_str and page_index:
+                            bbox = extract_bbox(bbox_str)
+                            x1, y1, _, y2 = bbox
+                            page_idx = int(page_index)
+
+                            if page_idx not in elements_by_page:
+                                elements_by_page[page_idx] = []
+
+                            elements_by_page[page_idx].append((y1, x1, li_html))
+                        else:
+                            # <li>没有位置信息，保留
+                            elements_without_pos.append(li_html)
+                    continue
+
                 for li in root.findall('.//li'):
                     bbox_str = li.get('bbox')
                     page_index = li.get('page_index')
-                    
+
                     if bbox_str and page_index:
                         bbox = extract_bbox(bbox_str)
                         x1, y1, _, y2 = bbox
                         page_idx = int(page_index)
-                        
+
                         if page_idx not in elements_by_page:
                             elements_by_page[page_idx] = []
-                        
+
                         # 将<li>转换为字符串
-                        li_html = ET.tostring(li, encoding='unicode')
-                        elements_by_page[page_idx].append({
-                            'html': li_html,
-                            'x': x1,
-                            'y': y1,
-                            'bbox': bbox,
-                            'type': 'li'
-                        })
+                        li_html = _xml_parser.tostring(li, encoding='unicode')
+                        elements_by_page[page_idx].append((y1, x1, li_html))
                     else:
                         # <li>没有位置信息，保留
-                        elements_without_pos.append(ET.tostring(li, encoding='unicode'))
+                        elements_without_pos.append(_xml_parser.tostring(li, encoding='unicode'))
                 continue  # 处理完这个<ul>，跳到下一个part
-            
+
             # 尝试从HTML中提取bbox和page_index
-            root = ET.fromstring(part)
             bbox_str = root.get('bbox')
             page_index = root.get('page_index')
             
@@ -138,13 +223,7 @@ def sort_html_by_position(html_str: str, y_group_threshold: float = 5.0) -> str:
                 if page_idx not in elements_by_page:
                     elements_by_page[page_idx] = []
                 
-                elements_by_page[page_idx].append({
-                    'html': part,
-                    'x': x1,
-                    'y': y1,
-                    'bbox': bbox,
-                    'type': root.tag
-                })
+                elements_by_page[page_idx].append((y1, x1, part))
             else:
                 # 没有位置信息的元素
                 elements_without_pos.append(part)
@@ -162,41 +241,46 @@ def sort_html_by_position(html_str: str, y_group_threshold: float = 5.0) -> str:
     for page_idx in sorted(elements_by_page.keys()):
         page_elements = elements_by_page[page_idx]
         
-        # 先按y坐标粗略排序
-        page_elements.sort(key=lambda e: e['y'])
-        
-        # 然后按y分组，组内按x排序
-        sorted_page_elements = []
-        current_group = []
-        last_y = -1
-        
-        for elem in page_elements:
-            if not current_group:
-                # 第一个元素
-                current_group = [elem]
-                last_y = elem['y']
-            elif abs(elem['y'] - last_y) < y_group_threshold:
-                # 同一行（y差异<5像素）
-                current_group.append(elem)
-            else:
-                # 新的一行，先处理当前组
-                current_group.sort(key=lambda e: e['x'])
-                sorted_page_elements.extend(current_group)
-                # 开始新组
-                current_group = [elem]
-                last_y = elem['y']
-        
-        # 处理最后一组
-        if current_group:
-            current_group.sort(key=lambda e: e['x'])
-            sorted_page_elements.extend(current_group)
-        
+        # 先按y坐标粗略排序（只按y，保持同y元素的原始顺序）
+        page_elements.sort(key=lambda e: e[0])
+
+        # 然后按y分组，组内按x排序。组号由组首元素的y决定（和原来的
+        # 逐组扫描一致；固定步长量化会在边界处改变分组），之后用
+        # (组号, x, 原序号) 一次排序代替逐组的小排序
+        decorated = []
+        group_id = -1
+        last_y = None
+        for idx, (y, x, _) in enumerate(page_elements):
+            if last_y is None or abs(y - last_y) >= y_group_threshold:
+                # 新的一行
+                group_id += 1
+                last_y = y
+            decorated.append((group_id, x, idx))
+        decorated.sort()
+
         # 把这一页的排序结果添加到总结果中
-        all_sorted_parts.extend([e['html'] for e in sorted_page_elements])
+        all_sorted_parts.extend([page_elements[idx][2] for _, _, idx in decorated])
     
     return '\n\n'.join(all_sorted_parts)
 
 
+def _flush_param(current_param: Dict, result_parts: List[str]) -> None:
+    """输出当前参数：有值则合并为键值对div，没有值则原样保留<li>
+
+    bbox直接复用解析时的属性字符串，避免每个参数多次走
+    str(list(...)) 的 float repr 格式化。
+    """
+    if current_param['values']:
+        merged_text = current_param['text'] + ": " + "; ".join([v['text'] for v in current_param['values']])
+        result_parts.append(
+            f'<div className="merged_key_value" bbox="{current_param["bbox_str"]}" page_index="{current_param["page_index"]}">{html_module.escape(merged_text)}</div>'
+        )
+    else:
+        result_parts.append(
+            f'<li bbox="{current_param["bbox_str"]}" page_index="{current_param["page_index"]}" className="listitem_wrapper">{html_module.escape(current_param["text"])}</li>'
+        )
+
+
 def merge_aligned_key_values_sequential(html_str: str,
                                        y_first_match_tolerance: float = 5.0,
                                        y_subsequent_tolerance: float = 60.0,
@@ -220,47 +304,42 @@ def merge_aligned_key_values_sequential(html_str: str,
     Returns:
         合并后的HTML字符串
     """
-    import html as html_module
-    
     parts = [p.strip() for p in html_str.split('\n\n') if p.strip()]
     
     result_parts = []
-    current_param = None  # {'text': str, 'bbox': tuple, 'page_index': str, 'values': []}
-    
-    for part in parts:
+    current_param = None  # {'text': str, 'bbox': tuple, 'bbox_str': str, 'page_index': int, 'values': []}
+
+    for part, root in _parse_all_parts(parts):
+        if root is None:
+            # 解析失败，直接输出
+            result_parts.append(part)
+            continue
+
         try:
-            root = ET.fromstring(part)
             tag = root.tag
             bbox_str = root.get('bbox')
             page_index = root.get('page_index')
             text = root.text or ''
-            
+
             if not bbox_str or not page_index:
                 # 没有位置信息，直接输出
                 result_parts.append(part)
                 continue
-            
+
             bbox = extract_bbox(bbox_str)
+            # 页码解析成int只做一次，后面的比较走整数而不是字符串
+            page_index = int(page_index)
             
             if tag == 'li':
                 # 遇到新的参数，先完成当前参数
-                if current_param and current_param['values']:
-                    # 输出合并后的参数
-                    merged_text = current_param['text'] + ": " + "; ".join([v['text'] for v in current_param['values']])
-                    merged_bbox_str = str(list(current_param['bbox']))
-                    result_parts.append(
-                        f'<div className="merged_key_value" bbox="{merged_bbox_str}" page_index="{current_param["page_index"]}">{html_module.escape(merged_text)}</div>'
-                    )
-                elif current_param:
-                    # 参数没有匹配到值，保留原样
-                    result_parts.append(
-                        f'<li bbox="{str(list(current_param["bbox"]))}" page_index="{current_param["page_index"]}" className="listitem_wrapper">{html_module.escape(current_param["text"])}</li>'
-                    )
-                
+                if current_param:
+                    _flush_param(current_param, result_parts)
+
                 # 开始新参数
                 current_param = {
                     'text': text,
                     'bbox': bbox,
+                    'bbox_str': bbox_str,
                     'page_index': page_index,
                     'values': []
                 }
@@ -305,16 +384,8 @@ def merge_aligned_key_values_sequential(html_str: str,
             
             else:
                 # 其他标签（h1, h2等），先完成当前参数
-                if current_param and current_param['values']:
-                    merged_text = current_param['text'] + ": " + "; ".join([v['text'] for v in current_param['values']])
-                    merged_bbox_str = str(list(current_param['bbox']))
-                    result_parts.append(
-                        f'<div className="merged_key_value" bbox="{merged_bbox_str}" page_index="{current_param["page_index"]}">{html_module.escape(merged_text)}</div>'
-                    )
-                elif current_param:
-                    result_parts.append(
-                        f'<li bbox="{str(list(current_param["bbox"]))}" page_index="{current_param["page_index"]}" className="listitem_wrapper">{html_module.escape(current_param["text"])}</li>'
-                    )
+                if current_param:
+                    _flush_param(current_param, result_parts)
                 current_param = None
                 
                 # 输出当前标签
@@ -325,17 +396,9 @@ def merge_aligned_key_values_sequential(html_str: str,
             result_parts.append(part)
     
     # 处理最后一个参数
-    if current_param and current_param['values']:
-        merged_text = current_param['text'] + ": " + "; ".join([v['text'] for v in current_param['values']])
-        merged_bbox_str = str(list(current_param['bbox']))
-        result_parts.append(
-            f'<div className="merged_key_value" bbox="{merged_bbox_str}" page_index="{current_param["page_index"]}">{html_module.escape(merged_text)}</div>'
-        )
-    elif current_param:
-        result_parts.append(
-            f'<li bbox="{str(list(current_param["bbox"]))}" page_index="{current_param["page_index"]}" className="listitem_wrapper">{html_module.escape(current_param["text"])}</li>'
-        )
-    
+    if current_param:
+        _flush_param(current_param, result_parts)
+
     return '\n\n'.join(result_parts)
 
 
@@ -373,25 +436,46 @@ def merge_aligned_key_values(html_str: str,
         
         # 检查是否是列表
         if '<ul className="list_wrapper">' in part and '</ul>' in part:
-            # 提取列表项
+            # 提取列表项。快路径用正则切片段，回退到XML解析
             try:
-                root = ET.fromstring(part)
+                li_parts = _split_li_fragments(part)
+                if li_parts is not None:
+                    parsed_lis = [(bbox_str or '[0,0,0,0]', page_index or '0', text)
+                                  for _, bbox_str, page_index, text in li_parts]
+                else:
+                    root = _xml_parser.fromstring(part)
+                    parsed_lis = [(li.get('bbox', '[0,0,0,0]'),
+                                   li.get('page_index', '0'),
+                                   li.text or '')
+                                  for li in root.findall('.//li')]
+
                 list_items = []
-                
-                for li in root.findall('.//li'):
-                    bbox_str = li.get('bbox', '[0,0,0,0]')
-                    page_index = li.get('page_index', '0')
-                    text = li.text or ''
+                for bbox_str, page_index, text in parsed_lis:
                     bbox = extract_bbox(bbox_str)
-                    
+
                     list_items.append({
                         'text': text,
                         'bbox': bbox,
-                        'page_index': page_index,
+                        # 中心y坐标在各层循环里反复用到，入口处算一次
+                        'y_center': (bbox[1] + bbox[3]) / 2,
+                        # 页码同理只解析一次，分桶和比较都走整数
+                        'page_index': int(page_index),
                         'matched': False,
                         'values': []  # 支持多个值
                     })
                 
+                # 按页分桶：每个div只和同页的列表项做几何测试，
+                # 跨页的项在桶查找时就被剪掉了
+                items_by_page = {}
+                for item in list_items:
+                    items_by_page.setdefault(item['page_index'], []).append(item)
+
+                # 每页未匹配项的y中心有序表：后续匹配里的"中间是否有
+                # 未匹配项"用一次二分回答，代替对整页列表项的线性扫描；
+                # 项首次匹配到值时从表里删掉对应的y中心
+                unmatched_centers = {page: sorted(item['y_center'] for item in items)
+                                     for page, items in items_by_page.items()}
+
                 # 尝试在后续的div中找到匹配的值
                 matched_any = False
                 values_to_remove = []
@@ -401,19 +485,28 @@ def merge_aligned_key_values(html_str: str,
                 j = i + 1
                 while j < len(parts) and j < i + 20:
                     next_part = parts[j].strip()
+                    # 这些div在相邻<ul>的窗口间会被反复扫描，正则快路径
+                    # 避免每次都走完整解析
                     if next_part.startswith('<div className="text_wrapper"'):
                         try:
-                            div_root = ET.fromstring(next_part)
-                            div_bbox_str = div_root.get('bbox', '[0,0,0,0]')
-                            div_page_index = div_root.get('page_index', '0')
-                            div_text = div_root.text or ''
+                            m = _ATTR_RE.match(next_part)
+                            if m is not None:
+                                div_bbox_str = m.group(2)
+                                div_page_index = m.group(3)
+                                div_text = html_module.unescape(m.group(4))
+                            else:
+                                div_root = _xml_parser.fromstring(next_part)
+                                div_bbox_str = div_root.get('bbox', '[0,0,0,0]')
+                                div_page_index = div_root.get('page_index', '0')
+                                div_text = div_root.text or ''
                             div_bbox = extract_bbox(div_bbox_str)
-                            
+
                             all_divs.append({
                                 'idx': j,
                                 'bbox': div_bbox,
+                                'y_center': (div_bbox[1] + div_bbox[3]) / 2,
                                 'text': div_text,
-                                'page_index': div_page_index,
+                                'page_index': int(div_page_index),
                                 'matched_item': None  # 记录匹配给哪个列表项
                             })
                         except:
@@ -423,26 +516,24 @@ def merge_aligned_key_values(html_str: str,
                 # 简化策略：明确区分首次匹配和后续匹配
                 for div in all_divs:
                     div_x, div_y1, _, div_y2 = div['bbox']
-                    div_y_center = (div_y1 + div_y2) / 2
-                    
+                    div_y_center = div['y_center']
+
                     matched = False
-                    
+                    page_items = items_by_page.get(div['page_index'], ())
+
                     # 首次匹配：必须与某个列表项基本水平对齐
                     # 严格条件避免误匹配
-                    for item in list_items:
-                        if item['page_index'] != div['page_index']:
-                            continue
-                        
+                    for item in page_items:
                         # 必须还没有值
                         if len(item['values']) > 0:
                             continue
                         
-                        if not is_right_of(item['bbox'], div['bbox']):
+                        # is_right_of 内联成一次浮点比较，去掉每对元素的
+                        # 函数调用开销（div_x 即 div bbox 的左边界）
+                        if div_x - item['bbox'][2] <= 50:
                             continue
                         
-                        _, item_y1, _, item_y2 = item['bbox']
-                        item_y_center = (item_y1 + item_y2) / 2
-                        y_distance = abs(div_y_center - item_y_center)
+                        y_distance = abs(div_y_center - item['y_center'])
                         
                         # 首次匹配条件：y距离 < 5像素（非常严格）
                         # 只有真正在同一行的才会被首次匹配
@@ -456,18 +547,23 @@ def merge_aligned_key_values(html_str: str,
                             matched_any = True
                             values_to_remove.append(div['idx'])
                             matched = True
+
+                            # 该项不再是未匹配项，从有序表里删掉它的y中心
+                            centers = unmatched_centers[div['page_index']]
+                            del centers[bisect.bisect_left(centers, item['y_center'])]
                             break
                     
                     if matched:
                         continue
                     
-                    # 后续匹配：明确在某个已匹配项的值下方
-                    candidates = []
-                    
-                    for item in list_items:
-                        if (not item['matched'] or 
-                            len(item['values']) == 0 or
-                            item['page_index'] != div['page_index']):
+                    # 后续匹配：明确在某个已匹配项的值下方。
+                    # 单遍argmin取距离最近的项，代替收集候选再排序；
+                    # 严格小于保证并列时仍取先遇到的项
+                    best_item = None
+                    best_y_distance = float('inf')
+
+                    for item in page_items:
+                        if not item['matched'] or len(item['values']) == 0:
                             continue
                         
                         last_bbox = item['values'][-1]['bbox']
@@ -480,42 +576,30 @@ def merge_aligned_key_values(html_str: str,
                         y_distance = div_y1 - last_y2
                         x_distance = abs(div_x - last_x)
                         
-                        # 后续值条件
-                        if y_distance < 60 and x_distance < 60:
+                        # 后续值条件；已经不可能更近的项直接跳过，
+                        # 省掉下面的列表项间隔检查
+                        if y_distance < best_y_distance and y_distance < 60 and x_distance < 60:
                             # 检查：div和最后一个值之间是否有未匹配的列表项
-                            # 如果有，div可能属于那个列表项，不是后续值
-                            has_unmatched_item_between = False
-                            for other_item in list_items:
-                                if (other_item['page_index'] != div['page_index'] or
-                                    len(other_item['values']) > 0):  # 已匹配的不算
-                                    continue
-                                
-                                _, other_y1, _, other_y2 = other_item['bbox']
-                                other_y_center = (other_y1 + other_y2) / 2
-                                
-                                # 检查这个列表项是否在 last_y2 和 div_y1 之间
-                                # 且div与它的距离<35像素（可能是首次匹配）
-                                if last_y2 < other_y_center < div_y1:
-                                    if abs(div_y_center - other_y_center) < 35:
-                                        has_unmatched_item_between = True
-                                        break
-                            
+                            # 如果有，div可能属于那个列表项，不是后续值。
+                            # 条件等价于y中心落在开区间
+                            # (max(last_y2, div中心-35), min(div_y1, div中心+35))，
+                            # 在有序表上二分判断区间是否非空
+                            centers = unmatched_centers.get(div['page_index'], ())
+                            lo = max(last_y2, div_y_center - 35)
+                            hi = min(div_y1, div_y_center + 35)
+                            pos = bisect.bisect_right(centers, lo)
+                            has_unmatched_item_between = pos < len(centers) and centers[pos] < hi
+
                             if not has_unmatched_item_between:
-                                candidates.append({
-                                    'item': item,
-                                    'y_distance': y_distance
-                                })
-                    
-                    # 选择距离最近的
-                    if candidates:
-                        candidates.sort(key=lambda c: c['y_distance'])
-                        best = candidates[0]
-                        
-                        best['item']['values'].append({
+                                best_y_distance = y_distance
+                                best_item = item
+
+                    if best_item is not None:
+                        best_item['values'].append({
                             'text': div['text'],
                             'bbox': div['bbox']
                         })
-                        div['matched_item'] = best['item']
+                        div['matched_item'] = best_item
                         values_to_remove.append(div['idx'])
                 
                 # 如果有匹配，生成新的HTML
@@ -1,4 +1,5 @@
 import tiktoken
+import httpx
 from litellm import completion, litellm
 import os
 from dotenv import load_dotenv
@@ -8,6 +9,14 @@ load_dotenv()
 
 #litellm.set_verbose=True
 
+# 复用同一个连接池，避免每次调用都重新建立 TCP/TLS 连接
+if getattr(litellm, "client_session", None) is None:
+    litellm.client_session = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=16))
+if getattr(litellm, "aclient_session", None) is None:
+    litellm.aclient_session = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=16))
+
 # 阿里云 DashScope OpenAI 兼容 API 地址
 DASHSCOPE_API_BASE = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 
@@ -0,0 +1,85 @@
+"""简单数值参数的本地快速合规预判
+
+对形如 "≤25ms"、"≥10000次"、"4.8~5.8m/s"、"40kA" 的规范值与纯数值的
+用户值，在本地直接判断是否合规，避免把明显可判的参数送进大模型。
+判断规则与 compare_params 的匹配 prompt 保持一致：
+
+- 带符号规范值直接按符号比较
+- 范围规范值要求用户值落在范围内
+- 不带符号的规范值视为设备能力上限：用户值 ≤ 规范值即合规
+
+精确匹配型参数（断口数、操作顺序、电源电压等）不适用能力上限规则，
+须由调用方排除后再走快速判断（见 compare_params._prefilter_batch）。
+无法确定（解析失败、单位不一致、符号组合含义不明）时返回 None，
+由调用方回退到大模型判断。
+"""
+import re
+from typing import Optional, Tuple
+
+# 数值 + 可选单位（单位部分不含数字、空白和比较符号）
+_NUM = r"(\d+(?:\.\d+)?)"
+_UNIT = r"([^\d\s≤≥<>~～\-]*)"
+
+_OP_RE = re.compile(rf"^\s*([≤≥<>]?)\s*{_NUM}\s*{_UNIT}\s*$")
+_RANGE_RE = re.compile(rf"^\s*{_NUM}\s*[~～]\s*{_NUM}\s*{_UNIT}\s*$")
+
+
+def parse_quantity(text: str) -> Optional[Tuple[str, float, str]]:
+    """解析 "≤25ms" 形式的数值表达，返回 (符号, 数值, 单位)，失败返回 None"""
+    m = _OP_RE.match(text)
+    if not m:
+        return None
+    op, num, unit = m.groups()
+    return op, float(num), unit.lower()
+
+
+def parse_range(text: str) -> Optional[Tuple[float, float, str]]:
+    """解析 "4.8~5.8m/s" 形式的范围表达，返回 (下限, 上限, 单位)"""
+    m = _RANGE_RE.match(text)
+    if not m:
+        return None
+    lo, hi, unit = m.groups()
+    return float(lo), float(hi), unit.lower()
+
+
+def fast_compare(user_text: str, spec_text: str) -> Optional[bool]:
+    """若用户值与规范值都是简单数值表达则本地判断合规性
+
+    Returns:
+        True/False 表示判断结果，None 表示无法本地判定（交给大模型）
+    """
+    user = parse_quantity(user_text)
+    if user is None:
+        return None
+    user_op, user_val, user_unit = user
+
+    spec_range = parse_range(spec_text)
+    if spec_range is not None:
+        lo, hi, spec_unit = spec_range
+        if user_op or user_unit != spec_unit:
+            return None
+        return lo <= user_val <= hi
+
+    spec = parse_quantity(spec_text)
+    if spec is None:
+        return None
+    spec_op, spec_val, spec_unit = spec
+
+    if user_unit != spec_unit:
+        return None
+
+    if spec_op in ("≤", "<"):
+        # 规范给出上限：用户要求值不超过上限即合规
+        if user_op in ("", "≤", "<"):
+            return user_val <= spec_val
+        return None
+    if spec_op in ("≥", ">"):
+        # 规范给出下限：用户要求值不低于下限即合规
+        if user_op in ("", "≥", ">"):
+            return user_val >= spec_val
+        return None
+
+    # 无符号规范值视为能力/额定值，用户要求不超过设备能力即合规
+    if user_op == "":
+        return user_val <= spec_val
+    return None
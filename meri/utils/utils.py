@@ -1,10 +1,14 @@
-import fitz
 from PIL import Image
 import json
-from litellm import completion, litellm
-import base64
 import io
 
+# pybase64 uses SIMD intrinsics and is a drop-in replacement; fall back to
+# the stdlib encoder when it is not installed
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 def scale_coords(source_coords, source_height, source_width, target_height, target_width):
     '''Transforms source coordinates (x0, y0, x1, y1)
     to target coordinates (x0,y0, x1,y1)'''
@@ -22,27 +26,32 @@ def scale_coords(source_coords, source_height, source_width, target_height, targ
 
     return rect_shape
 
-def pdf_to_im(page, cropbbox=None):
-    """ Converts pdf to image and if provided crops image by cropbox
+def pdf_to_im(page, cropbbox=None, dpi=None):
+    """ Converts pdf to image and if provided crops image by cropbox.
+    dpi overrides MuPDF's default render resolution (72 dpi).
     """
 
-    pix = page.get_pixmap()
+    pix = page.get_pixmap(dpi=dpi) if dpi else page.get_pixmap()
     pil_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    # drop the MuPDF pixmap buffer right away instead of waiting for the
+    # frame to unwind; these are ~10MB+ per page
+    pix = None
     if cropbbox is None:
         return pil_image
     cropped_im = pil_image.crop(cropbbox)
-    return cropped_im 
+    return cropped_im
 
 def pil_to_base64(pil_image: Image, raw=True):
     """ Converts PIL to base64 string
     """
-    # Convert PIL Image to bytes
+    # Convert PIL Image to bytes. compress_level 1 instead of zlib's default 6:
+    # the PNGs are only transported inline, so encode speed beats size
     with io.BytesIO() as buffer:
-        pil_image.save(buffer, format="PNG")
+        pil_image.save(buffer, format="PNG", optimize=False, compress_level=1)
         image_bytes = buffer.getvalue()
 
     # Convert bytes to base64 string
-    base64_image = base64.b64encode(image_bytes).decode('utf-8')
+    base64_image = _b64encode(image_bytes).decode('utf-8')
     if raw:
         return base64_image
     else: 
@@ -14,6 +14,7 @@
     streamlit run web_app.py
 """
 
+import asyncio
 import json
 import os
 import sys
@@ -694,9 +695,9 @@ def render_comparison(model: str):
             status_placeholder.info("⏳ 正在进行语义匹配比对...")
             progress_bar.progress(20, text="比对中...")
             
-            # 使用输出捕获执行比对
+            # 使用输出捕获执行比对（compare 是协程，需要在事件循环中执行）
             with capture_output(status_placeholder, log_placeholder):
-                result = comparator.compare(st.session_state.extraction_result)
+                result = asyncio.run(comparator.compare(st.session_state.extraction_result))
             
             st.session_state.comparison_result = result
             